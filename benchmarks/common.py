@@ -0,0 +1,78 @@
+"""Helpers shared by the benchmark scripts in this directory."""
+import logging
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Values the settings module insists on; benchmarks never talk to MySQL.
+BENCH_ENV = {
+    "SECRET_KEY": "benchmark",
+    "DB_ENGINE": "django.db.backends.sqlite3",
+    "DB_NAME": ":memory:",
+    "DB_USER": "",
+    "DB_PASSWORD": "",
+    "DB_HOST": "",
+    "DB_PORT": "",
+}
+
+
+def setup_django(settings_module="cottageCalendar.settings", **env):
+    """Configure and set up Django for a standalone benchmark process."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+    # The views log every request at DEBUG, which would dominate timings.
+    # logging.disable survives the logging config that django.setup() (and
+    # get_wsgi_application) applies.
+    logging.disable(logging.DEBUG)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def wsgi_call(application, path, method="GET", headers=None, data=None):
+    """
+    Run one request through a WSGI application the way a real server does,
+    including the request_started/request_finished signals that manage DB
+    connections. Returns the status code.
+    """
+    from django.test import RequestFactory
+
+    factory = RequestFactory(**(headers or {}))
+    request = factory.generic(method, path, data or "", content_type="application/json")
+    status = {}
+
+    def start_response(status_line, response_headers, exc_info=None):
+        status["code"] = int(status_line.split(" ", 1)[0])
+
+    response = application(request.environ, start_response)
+    for _ in response:
+        pass
+    response.close()
+    return status["code"]
+
+
+def report(title, rows):
+    """Print rows of (label, value) pairs as an aligned table."""
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print("  %s  %s" % (label.ljust(width), value))
@@ -0,0 +1,126 @@
+"""
+Compare request latency with per-request connections, persistent
+connections and the optional in-process pool.
+
+Each mode runs in its own process against a temporary SQLite database.
+SQLite connects almost for free, so --connect-delay adds a sleep to every
+new connection to stand in for a MySQL handshake over the network.
+
+    python benchmarks/connections.py --requests 2000 --connect-delay 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import percentile, report, setup_django, wsgi_call
+
+MODES = {
+    "per-request": {"DB_CONN_MAX_AGE": "0", "DB_POOL_SIZE": "0"},
+    "persistent": {"DB_CONN_MAX_AGE": "600", "DB_POOL_SIZE": "0"},
+    "pooled": {"DB_CONN_MAX_AGE": "0", "DB_POOL_SIZE": "4"},
+}
+
+
+def run_mode(requests, connect_delay):
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+    from django.contrib.auth.models import User
+    from django.db.backends.sqlite3 import base
+    from rest_framework.authtoken.models import Token
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user(username="bench", password="bench-password")
+    token = Token.objects.create(user=user)
+
+    connects = []
+    get_new_connection = base.DatabaseWrapper.get_new_connection
+
+    def slow_get_new_connection(self, conn_params):
+        connects.append(1)
+        time.sleep(connect_delay / 1000.0)
+        return get_new_connection(self, conn_params)
+
+    base.DatabaseWrapper.get_new_connection = slow_get_new_connection
+
+    from django.db import connection
+
+    connection.close()
+    application = get_wsgi_application()
+    headers = {"HTTP_AUTHORIZATION": "Token " + token.key}
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = wsgi_call(application, "/users/all", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert status == 200, status
+    return {
+        "connects": len(connects),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--connect-delay",
+        type=float,
+        default=2.0,
+        help="milliseconds added to every new connection",
+    )
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        setup_django()
+        print(json.dumps(run_mode(args.requests, args.connect_delay)))
+        return
+
+    rows = []
+    for mode, env in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            child_env = dict(
+                os.environ, DB_NAME=os.path.join(tmp, "bench.sqlite3"), **env
+            )
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--mode",
+                    mode,
+                    "--requests",
+                    str(args.requests),
+                    "--connect-delay",
+                    str(args.connect_delay),
+                ],
+                env=child_env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        rows.append(
+            (
+                mode,
+                "connects=%(connects)5d  mean=%(mean)6.2fms  p50=%(p50)6.2fms  "
+                "p95=%(p95)6.2fms  p99=%(p99)6.2fms" % result,
+            )
+        )
+    report(
+        "GET /users/all x %d, %.1fms connect delay"
+        % (args.requests, args.connect_delay),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
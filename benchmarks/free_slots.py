@@ -0,0 +1,135 @@
+"""
+Free-slot and availability queries against decades of bookings: the
+in-process calendar index (cold load and warm) compared with scanning the
+Date rows of the range on every request.
+
+    python benchmarks/free_slots.py --years 30 --density 0.4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import percentile, report, setup_django
+
+RANGES = [("one month", 31), ("one year", 365), ("ten years", 3650)]
+
+
+def populate(years, density, seed):
+    from django.contrib.auth.models import User
+
+    from scheduler.models import Date
+    from scheduler.properties import property_id
+
+    user = User.objects.create(username="bench")
+    rng = random.Random(seed)
+    first = date(2023, 1, 1)
+    days = [
+        first + timedelta(days=offset)
+        for offset in range((date(2023 + years, 1, 1) - first).days)
+        if rng.random() < density
+    ]
+    Date.objects.bulk_create(
+        [
+            Date(property_id=property_id(), date=day.isoformat(), user_ids=[user.pk])
+            for day in days
+        ],
+        batch_size=2000,
+    )
+    return first, len(days)
+
+
+def scan_free_slots(property_id, start, end, length):
+    """The per-request alternative: read every row in the range."""
+    from scheduler.models import Date
+
+    booked = sorted(
+        date.fromisoformat(day).toordinal()
+        for day, user_ids in Date.objects.filter(
+            property_id=property_id,
+            date__gte=start.isoformat(),
+            date__lte=end.isoformat(),
+        ).values_list("date", "user_ids")
+        if user_ids
+    )
+    slots = []
+    previous = start.toordinal() - 1
+    for day in booked + [end.toordinal() + 1]:
+        if day - previous - 1 >= length:
+            slots.append((date.fromordinal(previous + 1), date.fromordinal(day - 1)))
+        previous = day
+    return slots
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return "p50 %9.1fus  p99 %9.1fus" % (
+        percentile(samples, 50),
+        percentile(samples, 99),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--density", type=float, default=0.4)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.core.management import call_command
+
+    from scheduler import calendar_index
+    from scheduler.properties import property_id
+
+    call_command("migrate", verbosity=0)
+    first, booked = populate(args.years, args.density, args.seed)
+    pk = property_id()
+    print("%d booked days over %d years" % (booked, args.years))
+
+    def cold_year():
+        calendar_index.index.clear()
+        calendar_index.index.year(pk, first.year)
+
+    rows = [("load one year into the index", timed(cold_year, args.repeat))]
+    calendar_index.warm(args.years)
+    for label, days in RANGES:
+        end = first + timedelta(days=days - 1)
+        rows.append(
+            (
+                "free slots, %s, index" % label,
+                timed(
+                    lambda: calendar_index.free_slots(pk, first, end, 5), args.repeat
+                ),
+            )
+        )
+        rows.append(
+            (
+                "free slots, %s, row scan" % label,
+                timed(lambda: scan_free_slots(pk, first, end, 5), args.repeat),
+            )
+        )
+        assert calendar_index.free_slots(pk, first, end, 5) == scan_free_slots(
+            pk, first, end, 5
+        )
+
+    def availability():
+        days = calendar_index.index.year(pk, first.year).days()
+        numbers = calendar_index.day_numbers(first.year, days)
+        return calendar_index.bitmap(numbers, calendar_index.year_length(first.year))
+
+    rows.append(("availability bitmap, one year", timed(availability, args.repeat)))
+    report("Calendar index, property %s" % pk, rows)
+
+
+if __name__ == "__main__":
+    main()
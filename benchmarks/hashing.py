@@ -0,0 +1,83 @@
+"""
+Logins per second per core for each password hasher policy, plus the
+token reuse path that skips hashing entirely.
+
+    python benchmarks/hashing.py --logins 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import report, setup_django
+
+POLICIES = [
+    ("pbkdf2 (Django default)", "pbkdf2", {}),
+    ("scrypt n=2^14 r=8 p=1", "scrypt", {"PASSWORD_SCRYPT_WORK_FACTOR": 2**14}),
+    ("scrypt n=2^15 r=8 p=1", "scrypt", {"PASSWORD_SCRYPT_WORK_FACTOR": 2**15}),
+    ("argon2id t=2 m=19MiB p=1", "argon2", {}),
+]
+
+
+def logins_per_second(application, logins, headers=None, data=None):
+    from benchmarks.common import wsgi_call
+    import json
+
+    body = json.dumps(data)
+    start = time.perf_counter()
+    for _ in range(logins):
+        status = wsgi_call(application, "/login", "POST", headers, body)
+        assert status == 200, status
+    return logins / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+    from rest_framework.authtoken.models import Token
+
+    call_command("migrate", verbosity=0)
+    application = get_wsgi_application()
+    credentials = {"username": "bench", "password": "bench-password-1"}
+
+    rows = []
+    for label, name, overrides in POLICIES:
+        hashers = [settings._PASSWORD_HASHERS[name]] + [
+            hasher
+            for other, hasher in settings._PASSWORD_HASHERS.items()
+            if other != name
+        ]
+        with override_settings(PASSWORD_HASHERS=hashers, **overrides):
+            User.objects.all().delete()
+            try:
+                User.objects.create_user(**credentials)
+            except ValueError as error:
+                rows.append((label, "skipped: %s" % error))
+                continue
+            rate = logins_per_second(application, args.logins, data=credentials)
+            rows.append((label, "%8.1f logins/s" % rate))
+
+    User.objects.all().delete()
+    token = Token.objects.create(user=User.objects.create_user(**credentials))
+    rate = logins_per_second(
+        application,
+        args.logins * 50,
+        headers={"HTTP_AUTHORIZATION": "Token " + token.key},
+        data={"username": "bench"},
+    )
+    rows.append(("token reuse", "%8.1f logins/s" % rate))
+    report("POST /login on one core", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Load generator simulating a busy booking season against a running server.
+
+Virtual users register, then loop through a weighted mix of the requests
+the Angular app makes: logging in, opening months of the summer season,
+viewing and booking days, and adding and editing notes. Results are
+reported per endpoint: throughput, p50/p95/p99 latency and error rates.
+
+Plain asyncio over HTTP/1.1 keep-alive connections, no dependencies.
+
+    # against a server you started yourself (set THROTTLE_RATE_TOKEN high)
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --users 50
+
+    # start runserver on a throwaway SQLite database for the run
+    python benchmarks/loadtest.py --serve --users 20 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import BENCH_ENV, ROOT, percentile
+
+SEASON_YEAR = 2024
+SEASON_MONTHS = ["06", "07", "08", "09"]
+
+
+class HttpError(Exception):
+    pass
+
+
+class Connection:
+    """A minimal HTTP/1.1 keep-alive client connection."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None, token=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = [
+            "%s %s HTTP/1.1" % (method, path),
+            "Host: %s:%d" % (self.host, self.port),
+            "Accept: application/json",
+            "Content-Length: %d" % len(payload),
+        ]
+        if body is not None:
+            headers.append("Content-Type: application/json")
+        if token:
+            headers.append("Authorization: Token " + token)
+        message = ("\r\n".join(headers) + "\r\n\r\n").encode() + payload
+
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            try:
+                self.writer.write(message)
+                await self.writer.drain()
+                return await self.read_response()
+            except (ConnectionError, asyncio.IncompleteReadError, HttpError):
+                # The server closed an idle keep-alive connection; retry once.
+                self.close()
+                if attempt:
+                    raise
+
+    async def read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError("connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            self.close()
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, elapsed, status, expected=()):
+        self.latencies[endpoint].append(elapsed * 1000)
+        self.statuses[endpoint][status] += 1
+        if status == "error" or (
+            status >= 400 and status != 429 and status not in expected
+        ):
+            self.errors[endpoint] += 1
+
+    def report(self, duration):
+        print(
+            "%-22s %8s %8s %8s %8s %8s %7s %7s"
+            % (
+                "endpoint",
+                "requests",
+                "req/s",
+                "p50 ms",
+                "p95 ms",
+                "p99 ms",
+                "errors",
+                "429s",
+            )
+        )
+        total = 0
+        for endpoint in sorted(self.latencies):
+            samples = self.latencies[endpoint]
+            statuses = self.statuses[endpoint]
+            errors = self.errors[endpoint]
+            total += len(samples)
+            print(
+                "%-22s %8d %8.1f %8.2f %8.2f %8.2f %6.2f%% %7d"
+                % (
+                    endpoint,
+                    len(samples),
+                    len(samples) / duration,
+                    percentile(samples, 50),
+                    percentile(samples, 95),
+                    percentile(samples, 99),
+                    100.0 * errors / len(samples),
+                    statuses.get(429, 0),
+                )
+            )
+        print("%-22s %8d %8.1f" % ("total", total, total / duration))
+
+
+class VirtualUser:
+    def __init__(self, connection, stats, rng):
+        self.connection = connection
+        self.stats = stats
+        self.rng = rng
+        self.username = "load-" + uuid.uuid4().hex[:12]
+        self.password = "Season-" + uuid.uuid4().hex
+        self.token = None
+        self.user_id = None
+        self.note_ids = []
+
+    async def call(self, endpoint, method, path, body=None, auth=True, expected=()):
+        start = time.perf_counter()
+        try:
+            status, payload = await self.connection.request(
+                method, path, body, self.token if auth else None
+            )
+        except (OSError, HttpError, asyncio.IncompleteReadError):
+            self.stats.record(endpoint, time.perf_counter() - start, "error")
+            return None, None
+        self.stats.record(endpoint, time.perf_counter() - start, status, expected)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def random_day(self):
+        month = self.rng.choice(SEASON_MONTHS)
+        return "%d-%s-%02d" % (SEASON_YEAR, month, self.rng.randint(1, 30))
+
+    async def register(self):
+        status, data = await self.call(
+            "POST register",
+            "POST",
+            "/register",
+            {"username": self.username, "password": self.password},
+            auth=False,
+        )
+        if status == 201:
+            self.token, self.user_id = data["token"], data["user_id"]
+
+    async def login(self):
+        status, data = await self.call(
+            "POST login",
+            "POST",
+            "/login",
+            {"username": self.username, "password": self.password},
+            auth=False,
+        )
+        if status == 200:
+            self.token = data["token"]
+
+    async def view_month(self):
+        month = self.rng.choice(SEASON_MONTHS)
+        await self.call(
+            "GET month/<y>/<m>", "GET", "/month/%d/%s" % (SEASON_YEAR, month)
+        )
+
+    async def view_day(self):
+        # Most days are not booked yet.
+        await self.call(
+            "GET date/<id>", "GET", "/date/" + self.random_day(), expected=(404,)
+        )
+
+    async def book_day(self):
+        day = self.random_day()
+        status, _ = await self.call(
+            "POST date",
+            "POST",
+            "/date",
+            {"date": day, "user_ids": [self.user_id], "notes": []},
+            expected=(400,),
+        )
+        if status == 400:
+            # Someone already created the day, join the booking instead.
+            await self.call(
+                "PATCH date/<id>",
+                "PATCH",
+                "/date/" + day,
+                {"user_ids": [self.user_id]},
+            )
+
+    async def add_note(self):
+        day = self.random_day()
+        await self.call(
+            "POST date",
+            "POST",
+            "/date",
+            {"date": day, "user_ids": [], "notes": []},
+            expected=(400,),
+        )
+        status, data = await self.call(
+            "POST notes",
+            "POST",
+            "/notes",
+            {"date": day, "user_id": self.user_id, "message": "Bringing the canoe"},
+        )
+        if status == 201:
+            self.note_ids.append(data)
+
+    async def view_note(self):
+        if self.note_ids:
+            note_id = self.rng.choice(self.note_ids)
+            await self.call("GET note/<id>", "GET", "/note/%d" % note_id)
+
+    async def edit_note(self):
+        if self.note_ids:
+            note_id = self.rng.choice(self.note_ids)
+            await self.call(
+                "PATCH note/<id>",
+                "PATCH",
+                "/note/%d" % note_id,
+                {"message": "Bringing the canoe and the kayak"},
+            )
+
+
+# Weighted actions per scenario, roughly what the app does per page view.
+SCENARIOS = {
+    "booking-season": [
+        (40, VirtualUser.view_month),
+        (20, VirtualUser.view_day),
+        (10, VirtualUser.book_day),
+        (8, VirtualUser.add_note),
+        (12, VirtualUser.view_note),
+        (5, VirtualUser.edit_note),
+        (5, VirtualUser.login),
+    ],
+    "group-message": [
+        # Everyone opens the same month at once after a family message.
+        (80, VirtualUser.view_month),
+        (15, VirtualUser.view_day),
+        (5, VirtualUser.login),
+    ],
+    "browse": [
+        (60, VirtualUser.view_month),
+        (30, VirtualUser.view_day),
+        (10, VirtualUser.view_note),
+    ],
+}
+
+
+async def run_user(host, port, stats, scenario, deadline, think_time, seed):
+    rng = random.Random(seed)
+    user = VirtualUser(Connection(host, port), stats, rng)
+    await user.register()
+    if user.token is None:
+        user.connection.close()
+        return
+    weights, actions = zip(*SCENARIOS[scenario])
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, weights)[0]
+        await action(user)
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1.0 / think_time))
+    user.connection.close()
+
+
+async def run(host, port, users, duration, scenario, think_time, seed):
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_user(host, port, stats, scenario, deadline, think_time, seed + index)
+            for index in range(users)
+        )
+    )
+    stats.report(time.perf_counter() - start)
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("server did not start on %s:%d" % (host, port))
+
+
+def serve(port, tmp):
+    """Start runserver on a fresh SQLite database, return the process."""
+    env = dict(os.environ)
+    env.update(BENCH_ENV)
+    env.update(
+        DB_NAME=os.path.join(tmp, "loadtest.sqlite3"),
+        ALLOWED_HOSTS="127.0.0.1,localhost",
+        THROTTLE_RATE_TOKEN="1000000/min",
+    )
+    manage = os.path.join(ROOT, "manage.py")
+    subprocess.run(
+        [sys.executable, manage, "migrate", "--noinput", "-v", "0"],
+        env=env,
+        check=True,
+    )
+    server = subprocess.Popen(
+        [sys.executable, manage, "runserver", "--noreload", "127.0.0.1:%d" % port],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_for_port("127.0.0.1", port)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="booking-season")
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="mean pause between actions"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--serve", action="store_true", help="start runserver with SQLite for the run"
+    )
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    print(
+        "%s: %d users for %ss against %s"
+        % (args.scenario, args.users, args.duration, args.url)
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        server = serve(port, tmp) if args.serve else None
+        try:
+            asyncio.run(
+                run(
+                    host,
+                    port,
+                    args.users,
+                    args.duration,
+                    args.scenario,
+                    args.think_time,
+                    args.seed,
+                )
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Time URL resolution for every API endpoint, for both the full URL conf and
+the API-only one, including paths that must be rejected at dispatch.
+
+    python benchmarks/routing.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import report, setup_django
+
+PATHS = [
+    "/date/2022-02-25",
+    "/month/2022/02",
+    "/date",
+    "/notes",
+    "/note/42",
+    "/users/all",
+    "/login",
+    "/register",
+    "/date/2023-02-31",
+    "/month/2022/13",
+    "/calendar/2022/02",
+]
+
+
+def time_resolve(urlconf, path, iterations):
+    from django.urls import Resolver404, resolve
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        try:
+            resolve(path, urlconf)
+        except Resolver404:
+            pass
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+    setup_django()
+
+    for urlconf in ["cottageCalendar.urls", "cottageCalendar.urls_api"]:
+        rows = [
+            (path, "%6.2fus" % time_resolve(urlconf, path, args.iterations))
+            for path in PATHS
+        ]
+        report("resolve() with %s" % urlconf, rows)
+
+
+if __name__ == "__main__":
+    main()
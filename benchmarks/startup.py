@@ -0,0 +1,103 @@
+"""
+Measure worker cold start and per-request middleware overhead for the full
+settings profile and the API-only profile.
+
+Every profile runs in a fresh interpreter so import costs are counted.
+
+    python benchmarks/startup.py --requests 2000
+"""
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = ["cottageCalendar.settings", "cottageCalendar.settings_api"]
+
+
+def run_profile(settings_module, requests):
+    from benchmarks.common import percentile, setup_django, wsgi_call
+
+    setup_django(settings_module)
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    application = get_wsgi_application()
+    get_resolver().url_patterns
+    startup = (time.perf_counter() - _started) * 1000
+    modules = len(sys.modules)
+
+    from django.core.management import call_command
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user(username="bench", password="bench-password")
+    headers = {"HTTP_AUTHORIZATION": "Token " + Token.objects.create(user=user).key}
+
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status = wsgi_call(application, "/users/all", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert status == 200, status
+    return {
+        "startup": startup,
+        "modules": modules,
+        "middleware": len(settings.MIDDLEWARE),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3, help="cold starts per profile")
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.profile, args.requests)))
+        return
+
+    from benchmarks.common import report
+
+    rows = []
+    for profile in PROFILES:
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--profile",
+                    profile,
+                    "--requests",
+                    str(args.requests),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        best = min(results, key=lambda result: result["startup"])
+        rows.append(
+            (
+                profile,
+                "startup=%(startup)7.1fms  modules=%(modules)4d  "
+                "middleware=%(middleware)d  p50=%(p50)5.2fms  p95=%(p95)5.2fms" % best,
+            )
+        )
+    report("Cold start (best of %d) and GET /users/all latency" % args.runs, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Time the scheduler test suite, serially and with --parallel, using the
+SQLite test settings. Pass --record to append the result as a JSON line so
+the suite's wall-clock time can be tracked over commits.
+
+    python benchmarks/test_suite.py --parallel 4 --record bench_output.txt
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_suite(parallel):
+    command = [
+        sys.executable,
+        "manage.py",
+        "test",
+        "--settings=cottageCalendar.settings_test",
+        "--noinput",
+    ]
+    if parallel > 1:
+        command.append("--parallel=%d" % parallel)
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit("test suite failed")
+    ran = [line for line in result.stderr.splitlines() if line.startswith("Ran ")]
+    return elapsed, ran[-1] if ran else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--parallel", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--record", help="append results to this file")
+    args = parser.parse_args()
+
+    serial, ran = run_suite(1)
+    parallel, _ = run_suite(args.parallel)
+    print(ran)
+    print("  serial       %.2fs" % serial)
+    print("  parallel=%-3d %.2fs" % (args.parallel, parallel))
+
+    if args.record:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        with open(args.record, "a") as record:
+            record.write(
+                json.dumps(
+                    {
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "revision": revision,
+                        "serial": round(serial, 3),
+                        "parallel": round(parallel, 3),
+                        "workers": args.parallel,
+                    }
+                )
+                + "\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+The cost of validating input: day ids with scheduler.dates compared with
+the looser model regex and date.fromisoformat check it replaced, a full batch of ids,
+and validating a POST /date payload, whose user ids are looked up in one
+query.
+
+    python benchmarks/validation.py --repeat 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import percentile, report, setup_django
+
+IDS = [
+    ("valid day", "2024-07-15"),
+    ("end of a long month", "2024-07-31"),
+    ("leap day", "2024-02-29"),
+    ("impossible day", "2023-02-31"),
+    ("not a day", "2023-W01-1"),
+]
+
+OLD_PATTERN = re.compile(r"^20[2-9][0-9]-[0-1][0-9]-[0-3][0-9]$")
+
+
+def old_is_day(value):
+    """The previous converter: the model's regex, then fromisoformat."""
+    if not OLD_PATTERN.match(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def per_call(fn, value, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(value)
+    return (time.perf_counter() - start) / repeat * 1e9
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return "p50 %9.1fus  p99 %9.1fus" % (
+        percentile(samples, 50),
+        percentile(samples, 99),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from scheduler.dates import is_day
+    from scheduler.serializers import DateSerializer
+
+    rows = []
+    for label, value in IDS:
+        rows.append(
+            (
+                "%s, scheduler.dates" % label,
+                "%7.0fns" % per_call(is_day, value, args.repeat),
+            )
+        )
+        rows.append(
+            (
+                "%s, old model regex" % label,
+                "%7.0fns" % per_call(old_is_day, value, args.repeat),
+            )
+        )
+
+    batch = ["2024-%02d-%02d" % (1 + i % 12, 1 + i % 28) for i in range(200)]
+    rows.append(
+        (
+            "a full batch of %d ids" % len(batch),
+            timed(lambda: [is_day(day) for day in batch], args.repeat // 100),
+        )
+    )
+
+    call_command("migrate", verbosity=0)
+    users = User.objects.bulk_create(
+        [User(username="user%d" % i) for i in range(args.users)]
+    )
+    payload = {
+        "date": "2024-07-15",
+        "user_ids": [user.pk for user in users],
+        "notes": [],
+    }
+
+    def validate():
+        serializer = DateSerializer(data=payload)
+        assert serializer.is_valid(), serializer.errors
+
+    rows.append(
+        (
+            "POST /date payload, %d users" % args.users,
+            timed(validate, args.repeat // 100),
+        )
+    )
+    rows.append(
+        (
+            "POST /date payload, impossible day",
+            timed(
+                lambda: DateSerializer(
+                    data={**payload, "date": "2023-02-31"}
+                ).is_valid(),
+                args.repeat // 100,
+            ),
+        )
+    )
+    report(
+        "Input validation (DATE_MAX_USERS=%d, DATA_UPLOAD_MAX_MEMORY_SIZE=%d)"
+        % (settings.DATE_MAX_USERS, settings.DATA_UPLOAD_MAX_MEMORY_SIZE),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
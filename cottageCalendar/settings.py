@@ -10,10 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 import environ
 import os
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 env = environ.Env(DEBUG=(bool, False))
 
@@ -30,7 +33,7 @@ SECRET_KEY = env("SECRET_KEY")
 
 DEBUG = env("DEBUG")
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 
 
 # Application definition
@@ -49,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "scheduler.sampling.SlowRequestMiddleware",
+    "scheduler.metrics.MetricsMiddleware",
+    "scheduler.limits.RequestSizeMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -111,6 +117,35 @@ LOGGING = {
     },
 }
 
+# Slow request records (see scheduler.sampling): requests slower than
+# SLOW_REQUEST_MS, 0 for none, and a random fraction of all requests, which
+# are profiled as well. SLOW_REQUEST_LOG sends the records to their own
+# file for `manage.py slow_requests` instead of the stream.
+SLOW_REQUEST_MS = env.int("SLOW_REQUEST_MS", default=1000)
+SLOW_REQUEST_SAMPLE_RATE = env.float("SLOW_REQUEST_SAMPLE_RATE", default=0.0)
+SLOW_REQUEST_MAX_QUERIES = env.int("SLOW_REQUEST_MAX_QUERIES", default=100)
+SLOW_REQUEST_PROFILE_LINES = env.int("SLOW_REQUEST_PROFILE_LINES", default=25)
+SLOW_REQUEST_LOG = env("SLOW_REQUEST_LOG", default="")
+if SLOW_REQUEST_LOG:
+    LOGGING["handlers"]["slow_requests"] = {
+        "level": "INFO",
+        "class": "logging.handlers.WatchedFileHandler",
+        "filename": SLOW_REQUEST_LOG,
+        "formatter": "json",
+    }
+    LOGGING["loggers"]["scheduler.sampling"] = {
+        "handlers": ["slow_requests"],
+        "level": "INFO",
+        "propagate": False,
+    }
+
+# /metrics, see scheduler.metrics. METRICS_DIR is a directory shared by the
+# worker processes; without it each process reports only its own metrics.
+# With METRICS_TOKEN set, scrapers must send it as a bearer token.
+METRICS_DIR = env("METRICS_DIR", default="")
+METRICS_FLUSH_SECONDS = env.float("METRICS_FLUSH_SECONDS", default=5.0)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
 WSGI_APPLICATION = "cottageCalendar.wsgi.application"
 
 
@@ -119,15 +154,45 @@ WSGI_APPLICATION = "cottageCalendar.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": env("DB_ENGINE", default="django.db.backends.mysql"),
         "NAME": env("DB_NAME"),
         "USER": env("DB_USER"),
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST"),
         "PORT": env("DB_PORT"),
+        # Reuse connections across requests instead of paying the
+        # handshake/auth cost every time. 0 closes after each request,
+        # None keeps connections open forever.
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=True),
     }
 }
 
+# Optional process-wide connection pool, mostly useful under ASGI where
+# requests do not stick to a single thread. Connections are returned to the
+# pool at the end of each request rather than being kept per thread.
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", default=0)
+if DB_POOL_SIZE:
+    _vendor = DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]
+    DATABASES["default"]["ENGINE"] = "scheduler.db." + _vendor
+    DATABASES["default"]["POOL_SIZE"] = DB_POOL_SIZE
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica-1.internal,replica-2.internal.
+# Views decorated with scheduler.routers.replica_reads read from them.
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(env.list("DB_REPLICA_HOSTS", default=[])):
+    _alias = "replica_%d" % _index
+    DATABASES[_alias] = dict(
+        DATABASES["default"], HOST=_host, TEST={"MIRROR": "default"}
+    )
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["scheduler.routers.ReplicaRouter"]
+
+# How long a user's reads stay on the primary after they write.
+REPLICA_PIN_SECONDS = env.int("DB_REPLICA_PIN_SECONDS", default=10)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -148,6 +213,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# The first hasher is used for new passwords; the others still verify old
+# hashes, which Django rehashes with the preferred hasher on the next login.
+# Choose with PASSWORD_HASHER (scrypt, argon2 or pbkdf2). argon2 needs the
+# argon2-cffi package.
+
+_PASSWORD_HASHERS = {
+    "scrypt": "scheduler.hashers.TunedScryptPasswordHasher",
+    "argon2": "scheduler.hashers.TunedArgon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = env("PASSWORD_HASHER", default="scrypt")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+
+# ~16 MiB and a few tens of milliseconds per login and core; see
+# benchmarks/hashing.py before changing.
+PASSWORD_SCRYPT_WORK_FACTOR = env.int("PASSWORD_SCRYPT_WORK_FACTOR", default=2**14)
+PASSWORD_SCRYPT_BLOCK_SIZE = env.int("PASSWORD_SCRYPT_BLOCK_SIZE", default=8)
+PASSWORD_SCRYPT_PARALLELISM = env.int("PASSWORD_SCRYPT_PARALLELISM", default=1)
+PASSWORD_ARGON2_TIME_COST = env.int("PASSWORD_ARGON2_TIME_COST", default=2)
+PASSWORD_ARGON2_MEMORY_COST = env.int("PASSWORD_ARGON2_MEMORY_COST", default=19456)
+PASSWORD_ARGON2_PARALLELISM = env.int("PASSWORD_ARGON2_PARALLELISM", default=1)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 
@@ -198,10 +289,86 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication"
+        "scheduler.authentication.ExpiringTokenAuthentication"
     ],
+    # Used by scheduler.throttling.TokenRateThrottle on the hot read views.
+    "DEFAULT_THROTTLE_RATES": {
+        "token": env("THROTTLE_RATE_TOKEN", default="120/min"),
+    },
 }
 
+# Background tasks, see scheduler.tasks and `manage.py run_tasks`.
+# TASKS_EAGER runs tasks in-process when the transaction commits instead.
+TASKS_EAGER = env.bool("TASKS_EAGER", default=False)
+# Running tasks older than this are assumed lost and run again.
+TASKS_TIMEOUT = env.int("TASKS_TIMEOUT_SECONDS", default=600)
+# Finished tasks are kept this long for inspection.
+TASKS_RETENTION = env.int("TASKS_RETENTION_SECONDS", default=7 * 24 * 3600)
+
+# The property served by the unscoped routes (`date/...` rather than
+# `properties/<slug>/date/...`). Created on first use.
+DEFAULT_PROPERTY = env("DEFAULT_PROPERTY", default="cottage")
+# CACHE_URL, e.g. redis://cache.internal:6379/1. The default is a separate
+# cache per process, in which a write in one worker cannot invalidate what
+# another worker has cached.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+SHARED_CACHE = not CACHES["default"]["BACKEND"].endswith(
+    (".LocMemCache", ".DummyCache")
+)
+
+# Month responses are cached per property until its bookings change, for at
+# most this long. 0 disables the cache, and needs a SHARED_CACHE otherwise.
+MONTH_CACHE_SECONDS = env.int("MONTH_CACHE_SECONDS", default=300 if SHARED_CACHE else 0)
+if MONTH_CACHE_SECONDS and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "MONTH_CACHE_SECONDS needs a CACHE_URL shared by every worker"
+    )
+
+# How long workers trust their cached latest archived day. Days archived by
+# `manage.py archive_calendar` can 404 for this long without a SHARED_CACHE.
+ARCHIVE_HORIZON_SECONDS = env.int("ARCHIVE_HORIZON_SECONDS", default=60)
+
+# Years of every property's calendar loaded into the in-process index by
+# calendar_index.warm() (this year onwards). Others load on first use.
+CALENDAR_INDEX_WARM_YEARS = env.int("CALENDAR_INDEX_WARM_YEARS", default=2)
+# Seconds before a loaded year is read again. Without a SHARED_CACHE this is
+# how long other workers' bookings can go unseen.
+CALENDAR_INDEX_MAX_AGE = env.int(
+    "CALENDAR_INDEX_MAX_AGE", default=3600 if SHARED_CACHE else 5
+)
+# The longest range, in days, a free-slots query may cover.
+FREE_SLOTS_MAX_DAYS = env.int("FREE_SLOTS_MAX_DAYS", default=3660)
+
+# The most dates and notes one `batch` request may ask for.
+BATCH_MAX_ITEMS = env.int("BATCH_MAX_ITEMS", default=200)
+# Users booked and notes added by one date write.
+DATE_MAX_USERS = env.int("DATE_MAX_USERS", default=100)
+DATE_MAX_NOTES = env.int("DATE_MAX_NOTES", default=50)
+# Request bodies, JSON included (see scheduler.limits).
+DATA_UPLOAD_MAX_MEMORY_SIZE = env.int("DATA_UPLOAD_MAX_MEMORY_SIZE", default=256 * 1024)
+
+# Email, used for booking digests (`manage.py send_booking_digests`).
+EMAIL_BACKEND = env(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_HOST = env("EMAIL_HOST", default="localhost")
+EMAIL_PORT = env.int("EMAIL_PORT", default=25)
+EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
+EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=False)
+DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="calendar@localhost")
+# Messages sent per SMTP connection round.
+DIGEST_BATCH_SIZE = env.int("DIGEST_BATCH_SIZE", default=50)
+
+# Tokens older than this are rejected; `manage.py sweep_tokens` deletes them.
+TOKEN_TTL = timedelta(seconds=env.int("TOKEN_TTL_SECONDS", default=30 * 24 * 3600))
+
+# POST responses are replayed to retries with the same Idempotency-Key for
+# this long; `manage.py sweep_idempotency_keys` deletes older ones.
+IDEMPOTENCY_KEY_TTL = timedelta(
+    seconds=env.int("IDEMPOTENCY_KEY_TTL_SECONDS", default=24 * 3600)
+)
+
 CORS_ALLOW_ALL_ORIGINS = (
     True  # If this is used then `CORS_ALLOWED_ORIGINS` will not have any effect
 )
@@ -212,5 +379,6 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOWED_ORIGIN_REGEXES = [
     "http://localhost:3030",
 ]
+CORS_ALLOW_HEADERS = [*default_headers, "idempotency-key"]
 
 # DEFAULT_EXCEPTION_REPORTER = 'django.views.debug.ExceptionReporter'
@@ -0,0 +1,46 @@
+"""
+Django settings for API-only cottageCalendar workers.
+
+Serves the JSON API from `cottageCalendar.urls_api` without the admin,
+sessions, messages, CSRF, static files or template machinery, which keeps
+worker start-up and per-request middleware cheap. The Angular app and the
+admin are served by a separate process using `cottageCalendar.settings`.
+
+    DJANGO_SETTINGS_MODULE=cottageCalendar.settings_api gunicorn cottageCalendar.wsgi
+"""
+
+from cottageCalendar.settings import *  # noqa: F401,F403
+from cottageCalendar.settings import INSTALLED_APPS, REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    )
+]
+
+# Token authentication is done by DRF, so no session, CSRF or message
+# middleware is needed.
+MIDDLEWARE = [
+    "scheduler.sampling.SlowRequestMiddleware",
+    "scheduler.metrics.MetricsMiddleware",
+    "scheduler.limits.RequestSizeMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+ROOT_URLCONF = "cottageCalendar.urls_api"
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    # The browsable API needs templates and sessions.
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
@@ -0,0 +1,58 @@
+"""
+Django settings for running the test suite.
+
+Uses in-memory SQLite databases and a fast password hasher so the suite
+needs no MySQL server and runs safely with --parallel.
+
+    python manage.py test --settings=cottageCalendar.settings_test --parallel
+"""
+
+import os
+
+# The base settings require these; tests never use real values.
+for _key, _value in {
+    "SECRET_KEY": "test-secret-key",
+    "DB_NAME": "",
+    "DB_USER": "",
+    "DB_PASSWORD": "",
+    "DB_HOST": "",
+    "DB_PORT": "",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from cottageCalendar.settings import *  # noqa: E402,F401,F403
+from cottageCalendar.settings import LOGGING  # noqa: E402
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+    # A second, independent database for the replica routing tests. Views
+    # only read from it when a test lists it in DATABASE_REPLICAS.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+
+DATABASE_REPLICAS = []
+
+# Hashing with the production hasher dominates tests that create users.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# TestCase never commits, so cached months would outlive the test.
+MONTH_CACHE_SECONDS = 0
+
+LOGGING = {
+    **LOGGING,
+    "loggers": {
+        "scheduler": {"handlers": ["stream"], "level": "WARNING", "propagate": True}
+    },
+}
@@ -17,22 +17,18 @@ from django.contrib import admin
 from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 from rest_framework import routers
-from scheduler import views
-from rest_framework.authtoken import views as token_views
+from cottageCalendar import urls_api
 
 router = routers.DefaultRouter()
 
 urlpatterns = [
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path("admin/", admin.site.urls),
-    path("date/<str:id>", views.getDateById),
-    path("month/<str:year>/<str:month>", views.getMonthById),
-    path("date", views.createDate),
-    path("notes", views.createNote),
-    path("note/<int:id>", views.getNote),
-    path("users/all", views.getNonAdminUsers),
-    path("login", views.CustomAuthToken.as_view()),
-    path("register", views.RegisterUser.as_view()),
+    *urls_api.urlpatterns,
     # url(r'^.*', TemplateView.as_view(template_name="home.html"), name="home")
-    re_path(r"(.)*$", TemplateView.as_view(template_name="home.html")),
+    # Everything else is the Angular app, but malformed API ids must still 404.
+    re_path(
+        r"^(?!(%s)(/|$)).*$" % "|".join(urls_api.API_PREFIXES),
+        TemplateView.as_view(template_name="home.html"),
+    ),
 ]
@@ -0,0 +1,54 @@
+"""cottageCalendar API URL Configuration
+
+JSON API routes only. Used on its own by API workers running with
+`cottageCalendar.settings_api`, and included by `cottageCalendar.urls`
+for the process that also serves the admin and the Angular app.
+"""
+from django.urls import include, path, register_converter
+from scheduler import converters, views
+
+register_converter(converters.DateConverter, "dateid")
+register_converter(converters.YearConverter, "year")
+register_converter(converters.MonthConverter, "month")
+
+# Path prefixes owned by the API, see the catch-all in cottageCalendar.urls.
+API_PREFIXES = [
+    "date",
+    "month",
+    "availability",
+    "free-slots",
+    "batch",
+    "notes",
+    "note",
+    "recurring",
+    "properties",
+    "users",
+    "login",
+    "register",
+    "metrics",
+]
+
+# Served for the default property here and for any property under
+# properties/<slug>/.
+property_urlpatterns = [
+    path("date/<dateid:id>", views.getDateById),
+    path("month/<year:year>/<month:month>", views.getMonthById),
+    path("availability/<year:year>", views.getAvailability),
+    path("free-slots", views.getFreeSlots),
+    path("batch", views.getBatch),
+    path("date", views.createDate),
+    path("notes", views.createNote),
+    path("note/<int:id>", views.getNote),
+    path("recurring", views.createRecurring),
+    path("recurring/<int:id>", views.getRecurring),
+]
+
+urlpatterns = [
+    *property_urlpatterns,
+    path("properties", views.getProperties),
+    path("properties/<slug:slug>/", include(property_urlpatterns)),
+    path("users/all", views.getNonAdminUsers),
+    path("login", views.CustomAuthToken.as_view()),
+    path("register", views.RegisterUser.as_view()),
+    path("metrics", views.getMetrics),
+]
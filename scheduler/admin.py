@@ -1,7 +1,111 @@
 from django.contrib import admin
+from django.db.models import Max, Min
 
 from .models import Date
 from .models import Note
+from .models import Property
+from .models import RecurringBooking
+from .models import Task
 
-admin.site.register(Date)
-admin.site.register(Note)
+
+class YearListFilter(admin.SimpleListFilter):
+    """Filter on the year of a YYYY-MM-DD date id, using its index."""
+
+    title = "year"
+    parameter_name = "year"
+    field = "date"
+
+    def lookups(self, request, model_admin):
+        # Two index lookups instead of a DISTINCT over every row.
+        bounds = Date.objects.aggregate(first=Min("date"), last=Max("date"))
+        if bounds["first"] is None:
+            return ()
+        first, last = int(bounds["first"][:4]), int(bounds["last"][:4])
+        return [(str(year), str(year)) for year in range(last, first - 1, -1)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field + "__startswith": self.value() + "-"})
+        return queryset
+
+
+class MonthListFilter(admin.SimpleListFilter):
+    """Narrows a selected year down to one month."""
+
+    title = "month"
+    parameter_name = "month"
+    field = "date"
+
+    def lookups(self, request, model_admin):
+        if not request.GET.get(YearListFilter.parameter_name):
+            return ()
+        return [("%02d" % month, "%02d" % month) for month in range(1, 13)]
+
+    def queryset(self, request, queryset):
+        year = request.GET.get(YearListFilter.parameter_name)
+        if year and self.value():
+            prefix = "%s-%s-" % (year, self.value())
+            return queryset.filter(**{self.field + "__startswith": prefix})
+        return queryset
+
+
+class NoteYearListFilter(YearListFilter):
+    field = "date__date"
+
+
+class NoteMonthListFilter(MonthListFilter):
+    field = "date__date"
+
+
+@admin.register(Property)
+class PropertyAdmin(admin.ModelAdmin):
+    list_display = ("slug", "name")
+    search_fields = ("=slug", "name")
+
+
+@admin.register(Date)
+class DateAdmin(admin.ModelAdmin):
+    list_display = ("date", "property")
+    list_select_related = ("property",)
+    list_filter = ("property", YearListFilter, MonthListFilter)
+    # Prefix search, ordering and the year bounds use the date index.
+    search_fields = ("^date",)
+    ordering = ("-date",)
+    raw_id_fields = ("users",)
+    list_per_page = 100
+    # Skip the unfiltered COUNT(*) on large tables.
+    show_full_result_count = False
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ("id", "day", "user", "message")
+    list_select_related = ("user", "date")
+    list_filter = ("date__property", NoteYearListFilter, NoteMonthListFilter)
+    search_fields = ("^date__date", "=user__username")
+    ordering = ("-date__date",)
+    raw_id_fields = ("user", "date")
+    list_per_page = 100
+    show_full_result_count = False
+
+    @admin.display(description="date", ordering="date__date")
+    def day(self, note):
+        return note.date.date
+
+
+@admin.register(RecurringBooking)
+class RecurringBookingAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "freq", "interval", "dtstart", "until", "count")
+    list_select_related = ("user",)
+    list_filter = ("freq",)
+    ordering = ("-dtstart",)
+    raw_id_fields = ("user",)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "finished")
+    list_filter = ("status", "name")
+    ordering = ("-run_at",)
+    list_per_page = 100
+    show_full_result_count = False
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class SchedulerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scheduler'
+
+    def ready(self):
+        from scheduler import (
+            calendar_index,
+            metrics,
+            notifications,
+            properties,
+            summaries,
+        )
+
+        summaries.connect()
+        notifications.connect()
+        properties.connect()
+        calendar_index.connect()
+        metrics.connect()
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+
+from scheduler.models import ArchivedDate, Date, Note, Property
+from scheduler.serializers import DateSerializer
+
+HORIZON_KEY = "archive-horizon:%s"
+
+
+def archive_horizon(property_id):
+    """
+    The property's latest archived date, or "" when nothing is archived.
+    Cached for ARCHIVE_HORIZON_SECONDS, as `archive_calendar` runs in its
+    own process and can only clear a shared cache.
+    """
+    horizon = cache.get(HORIZON_KEY % property_id)
+    if horizon is None:
+        archived = ArchivedDate.objects.filter(property_id=property_id)
+        horizon = archived.aggregate(last=Max("date"))["last"] or ""
+        cache.set(HORIZON_KEY % property_id, horizon, settings.ARCHIVE_HORIZON_SECONDS)
+    return horizon
+
+
+def archived_date(property_id, date_id):
+    """The archived DateSerializer data for a day, or None."""
+    if date_id > archive_horizon(property_id):
+        return None
+    archived = ArchivedDate.objects.filter(property_id=property_id, date=date_id)
+    archived = archived.first()
+    return archived.data if archived else None
+
+
+def archived_month(property_id, prefix):
+    """Archived days of a "YYYY-MM" month in DateMonthSerializer form."""
+    if prefix > archive_horizon(property_id)[:7]:
+        return []
+    archived = ArchivedDate.objects.filter(
+        property_id=property_id, date__startswith=prefix
+    ).order_by("date")
+    return [
+        {
+            "date": day.data["date"],
+            "users": day.data["users"],
+            "note_count": len(day.data["notes"]),
+        }
+        for day in archived.only("data")
+    ]
+
+
+def archive_dates(before, batch_size=500):
+    """
+    Move every Date before the year `before` (and its notes and bookings)
+    into ArchivedDate, one property and one transaction per batch at a time.
+    Returns the number of days archived.
+    """
+    cutoff = "%04d" % before
+    total = 0
+    for property_id in Property.objects.values_list("pk", flat=True):
+        try:
+            total += archive_property(property_id, cutoff, batch_size)
+        finally:
+            cache.delete(HORIZON_KEY % property_id)
+            archive_horizon(property_id)
+    return total
+
+
+def conflict_target():
+    # MySQL upserts on any unique key and refuses to be told which.
+    if connection.features.supports_update_conflicts_with_target:
+        return {"unique_fields": ["property", "date"]}
+    return {}
+
+
+def archive_property(property_id, cutoff, batch_size):
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Date.objects.filter(property_id=property_id, date__lt=cutoff)
+                .order_by("date")
+                .prefetch_related("users", "notes__user")[:batch_size]
+            )
+            if not batch:
+                return total
+            # A day archived before can have been created again since; the
+            # newer date replaces it.
+            ArchivedDate.objects.bulk_create(
+                [
+                    ArchivedDate(
+                        property_id=property_id,
+                        date=date.date,
+                        data=DateSerializer(date).data,
+                    )
+                    for date in batch
+                ],
+                update_conflicts=True,
+                update_fields=["data", "archived"],
+                **conflict_target(),
+            )
+            ids = [date.pk for date in batch]
+            Note.objects.filter(date__in=ids).delete()
+            Date.objects.filter(pk__in=ids).delete()
+        total += len(batch)
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_expired(token):
+    return token.created < timezone.now() - settings.TOKEN_TTL
+
+
+def issue_token(user):
+    """Return the user's token, replacing it if it has expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that rejects tokens older than TOKEN_TTL. The
+    check uses the row already fetched for the lookup, so it costs no
+    extra query.
+    """
+
+    def authenticate_credentials(self, key):
+        user, token = super().authenticate_credentials(key)
+        if token_expired(token):
+            raise exceptions.AuthenticationFailed("Token has expired.")
+        return user, token
+
+
+class OptionalTokenAuthentication(ExpiringTokenAuthentication):
+    """
+    Token authentication that ignores bad or expired tokens instead of
+    failing the request, for endpoints like login that must work without one.
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
@@ -0,0 +1,104 @@
+"""
+Many dates and notes read in one request, with the same results as their
+single-item endpoints but a fixed number of queries.
+"""
+
+from scheduler.archive import archive_horizon
+from scheduler.dates import is_day
+from scheduler.models import ArchivedDate, Date, Note
+from scheduler.recurrence import booked_on_days
+from scheduler.serializers import (
+    DateSerializer,
+    NoteSerializer,
+    UserSerializer,
+    booked_users,
+    date_users,
+)
+from scheduler.sparse import prune
+from scheduler.utils import parse_id
+
+NOT_FOUND = {"status": 404}
+INVALID = {"status": 400}
+
+
+def found(data):
+    return {"status": 200, "data": data}
+
+
+def date_details(property_id, date_ids, sparse=None):
+    """
+    Map each YYYY-MM-DD in `date_ids` to its `getDateById` response: live
+    dates with their recurring bookings, recurring-only days, then the
+    archive. `sparse` selects fields as for getDateById.
+    """
+    results = {}
+    valid = []
+    for date_id in date_ids:
+        if is_day(date_id):
+            valid.append(date_id)
+        else:
+            results[date_id] = INVALID
+    if not valid:
+        return results
+
+    dates = Date.objects.filter(property_id=property_id, date__in=valid)
+    live = {
+        day.date: (DateSerializer(day, sparse=sparse).data, day.user_ids)
+        for day in DateSerializer.prepare(dates, sparse)
+    }
+    recurring = booked_on_days(property_id, valid)
+    users = booked_users(set().union(*recurring.values()), sparse)
+
+    missing = [date_id for date_id in valid if date_id not in live]
+    archived = {}
+    if missing and min(missing) <= archive_horizon(property_id):
+        archived = dict(
+            ArchivedDate.objects.filter(
+                property_id=property_id, date__in=missing
+            ).values_list("date", "data")
+        )
+
+    for date_id in valid:
+        extra = [users[pk] for pk in sorted(recurring.get(date_id, ())) if pk in users]
+        if date_id in live:
+            data, booked = live[date_id]
+            extra = [user for user in extra if user.pk not in booked]
+            if extra and "users" in data:
+                data["users"] += date_users(extra, sparse)
+            results[date_id] = found(data)
+        elif extra:
+            data = {
+                "date": date_id,
+                "users": UserSerializer(extra, many=True).data,
+                "notes": [],
+            }
+            results[date_id] = found(prune(data, sparse))
+        elif date_id in archived:
+            results[date_id] = found(prune(archived[date_id], sparse))
+        else:
+            results[date_id] = NOT_FOUND
+    return results
+
+
+def note_details(property_id, note_ids, sparse=None):
+    """Map each note id in `note_ids` to its `getNote` response."""
+    results = {}
+    valid = {}
+    for note_id in note_ids:
+        pk = parse_id(note_id)
+        if pk is None:
+            results[note_id] = INVALID
+        else:
+            # Keyed as asked: "007" and "7" are both answered.
+            valid[note_id] = pk
+    notes = Note.objects.filter(
+        pk__in=set(valid.values()), date__property_id=property_id
+    )
+    notes = {note.pk: note for note in NoteSerializer.prepare(notes, sparse)}
+    for note_id, pk in valid.items():
+        note = notes.get(pk)
+        if note is None:
+            results[note_id] = NOT_FOUND
+        else:
+            results[note_id] = found(NoteSerializer(note, sparse=sparse).data)
+    return results
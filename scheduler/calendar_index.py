@@ -0,0 +1,297 @@
+"""
+An in-process index of booked days, per property and year, for questions
+about a whole calendar that should not cost a query per request.
+
+A year is loaded on first use from Date, ArchivedDate and the recurring
+rules. After that, booking changes made by this process are applied in
+place once their transaction commits. The index follows the property's
+cache namespace (see scheduler.properties): a version this process did not
+produce means another process changed the property, so its years are
+loaded again on next use. That needs a cache shared by every worker, so
+years are also loaded again once CALENDAR_INDEX_MAX_AGE seconds old.
+"""
+
+import base64
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from calendar import isleap
+from datetime import date
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from scheduler.models import ArchivedDate, Date, Property, RecurringBooking
+from scheduler.properties import version
+from scheduler.recurrence import booked_between
+from scheduler.signals import cache_accessed, namespace_changed
+from scheduler.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class Year:
+    """The booked days of one year, as {YYYY-MM-DD: frozenset of user ids}."""
+
+    def __init__(self, booked, recurring):
+        self.booked = booked
+        self.recurring = recurring
+        # Sorted date ordinals of the booked days, built on first use.
+        self.ordinals = None
+
+    def users(self, day):
+        return self.booked.get(day, frozenset()) | self.recurring.get(day, frozenset())
+
+    def days(self, user_id=None):
+        """Sorted booked days, by anyone or by `user_id`."""
+        days = self.booked.keys() | self.recurring.keys()
+        if user_id is not None:
+            days = [day for day in days if user_id in self.users(day)]
+        return sorted(days)
+
+
+class PropertyIndex:
+    def __init__(self, version):
+        self.version = version
+        self.loaded = time.monotonic()
+        self.years = {}
+        # Counts changes applied, so a year loaded meanwhile is not kept.
+        self.changes = 0
+
+    def expired(self, version):
+        age = time.monotonic() - self.loaded
+        return self.version != version or age >= settings.CALENDAR_INDEX_MAX_AGE
+
+
+def load_year(property_id, year):
+    # From the primary: the result is kept until the property changes again.
+    prefix = "%04d-" % year
+    dates = Date.objects.using(DEFAULT_DB_ALIAS).filter(
+        property_id=property_id, date__startswith=prefix
+    )
+    booked = {
+        day: frozenset(user_ids)
+        for day, user_ids in dates.values_list("date", "user_ids")
+        if user_ids
+    }
+    archived = ArchivedDate.objects.using(DEFAULT_DB_ALIAS).filter(
+        property_id=property_id, date__startswith=prefix
+    )
+    for day, data in archived.values_list("date", "data"):
+        users = frozenset(user["id"] for user in data["users"])
+        if users:
+            booked.setdefault(day, users)
+    recurring = {
+        day: frozenset(user_ids)
+        for day, user_ids in booked_between(
+            property_id, date(year, 1, 1), date(year, 12, 31)
+        ).items()
+    }
+    return Year(booked, recurring)
+
+
+class CalendarIndex:
+    def __init__(self):
+        # Guards _properties. Years load outside it, one load per property
+        # and year at a time, so a cold year holds up only its own readers.
+        self._lock = threading.Lock()
+        self._properties = {}
+        self._loads = SingleFlight()
+
+    def year(self, property_id, year):
+        current = version(property_id)
+        with self._lock:
+            entry = self._properties.get(property_id)
+            if entry is None or entry.expired(current):
+                entry = self._properties[property_id] = PropertyIndex(current)
+            loaded = entry.years.get(year)
+            changes = entry.changes
+        hit = loaded is not None
+        cache_accessed.send(sender=self.__class__, cache="calendar_index", hit=hit)
+        if hit:
+            return loaded
+
+        loaded = self._loads.do(
+            ("calendar_index", property_id, year), lambda: load_year(property_id, year)
+        )
+        with self._lock:
+            # Kept only if nothing changed the property while it loaded.
+            if self._properties.get(property_id) is entry and entry.changes == changes:
+                loaded = entry.years.setdefault(year, loaded)
+        return loaded
+
+    def ordinals(self, property_id, year):
+        """Sorted date ordinals of the booked days of a year."""
+        loaded = self.year(property_id, year)
+        with self._lock:
+            if loaded.ordinals is None:
+                loaded.ordinals = [
+                    date.fromisoformat(day).toordinal() for day in loaded.days()
+                ]
+            return loaded.ordinals
+
+    def update(self, property_id, day, added=(), removed=()):
+        with self._lock:
+            entry = self._properties.get(property_id)
+            if entry is None:
+                return
+            entry.changes += 1
+            loaded = entry.years.get(int(day[:4]))
+            if not loaded:
+                return
+            users = loaded.booked.get(day, frozenset()).union(added)
+            users = users.difference(removed)
+            if users:
+                loaded.booked[day] = users
+            else:
+                loaded.booked.pop(day, None)
+            loaded.ordinals = None
+
+    def adopt(self, property_id, version):
+        """
+        Follow a namespace change made by this process. Its changes are
+        applied already, unless another process changed the property in
+        between.
+        """
+        with self._lock:
+            entry = self._properties.get(property_id)
+            if entry is None:
+                return
+            if entry.version == version - 1:
+                entry.version = version
+            else:
+                del self._properties[property_id]
+
+    def drop(self, property_id):
+        with self._lock:
+            self._properties.pop(property_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._properties.clear()
+
+
+index = CalendarIndex()
+
+
+def warm(years=None):
+    """
+    Load this year and the next years - 1 for every property, so the first
+    requests a worker serves don't pay for it. Defaults to
+    CALENDAR_INDEX_WARM_YEARS. Nothing calls this at import, so workers
+    boot without the database; call it from a server hook after forking,
+    such as gunicorn's post_worker_init.
+    """
+    years = settings.CALENDAR_INDEX_WARM_YEARS if years is None else years
+    first = date.today().year
+    try:
+        for property_id in Property.objects.values_list("pk", flat=True):
+            for year in range(first, first + years):
+                index.year(property_id, year)
+    except DatabaseError:
+        # Still start: the index loads lazily on use.
+        logger.warning("Could not warm the calendar index", exc_info=True)
+
+
+def free_slots(property_id, start, end, length):
+    """
+    The free stretches of at least `length` days between start and end
+    inclusive, as (first, last) date pairs. Each stretch is as long as
+    possible, so callers can place a stay anywhere inside it.
+    """
+    first, last = start.toordinal(), end.toordinal()
+    booked = []
+    for year in range(start.year, end.year + 1):
+        ordinals = index.ordinals(property_id, year)
+        booked += ordinals[bisect_left(ordinals, first) : bisect_right(ordinals, last)]
+
+    slots = []
+    previous = first - 1
+    for day in booked + [last + 1]:
+        if day - previous - 1 >= length:
+            slots.append((date.fromordinal(previous + 1), date.fromordinal(day - 1)))
+        previous = day
+    return slots
+
+
+def year_length(year):
+    return 366 if isleap(year) else 365
+
+
+def day_numbers(year, days):
+    """Zero-based day-of-year numbers of YYYY-MM-DD days in `year`."""
+    first = date(year, 1, 1).toordinal()
+    return [date.fromisoformat(day).toordinal() - first for day in days]
+
+
+def bitmap(numbers, length):
+    """
+    Pack day numbers into a base64 bitmap: day n of the year is bit n % 8
+    (least significant first) of byte n // 8.
+    """
+    bits = 0
+    for number in numbers:
+        bits |= 1 << number
+    return base64.b64encode(bits.to_bytes((length + 7) // 8, "little")).decode()
+
+
+def runs(numbers):
+    """Sorted day numbers as [first day, length] runs of consecutive days."""
+    encoded = []
+    for number in numbers:
+        if encoded and encoded[-1][0] + encoded[-1][1] == number:
+            encoded[-1][1] += 1
+        else:
+            encoded.append([number, 1])
+    return encoded
+
+
+def bookings_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        if action == "pre_clear":
+            dates = instance.date_set.all()
+        else:
+            dates = Date.objects.filter(pk__in=pk_set)
+        days = list(dates.values_list("property_id", "date"))
+        users = {instance.pk}
+    else:
+        days = [(instance.property_id, instance.date)]
+        if action == "pre_clear":
+            users = set(instance.users.values_list("pk", flat=True))
+        else:
+            users = set(pk_set)
+    added, removed = (users, ()) if action == "post_add" else ((), users)
+
+    def apply():
+        for property_id, day in days:
+            index.update(property_id, day, added, removed)
+
+    transaction.on_commit(apply)
+
+
+def property_rows_changed(sender, instance, **kwargs):
+    # Deleted dates may have moved to the archive, and rule changes touch
+    # many days: load those again rather than patch them.
+    property_id = instance.property_id
+    transaction.on_commit(lambda: index.drop(property_id))
+
+
+def property_deleted(sender, instance, **kwargs):
+    index.drop(instance.pk)
+
+
+def namespace_moved(sender, property_id, version, **kwargs):
+    index.adopt(property_id, version)
+
+
+def connect():
+    m2m_changed.connect(bookings_changed, sender=Date.users.through)
+    post_delete.connect(property_rows_changed, sender=Date)
+    post_save.connect(property_rows_changed, sender=RecurringBooking)
+    post_delete.connect(property_rows_changed, sender=RecurringBooking)
+    post_delete.connect(property_deleted, sender=Property)
+    namespace_changed.connect(namespace_moved)
@@ -0,0 +1,40 @@
+from datetime import date
+
+from scheduler import dates
+
+
+class DateConverter:
+    """A `Date` id, YYYY-MM-DD after 2020, that is a real calendar day."""
+
+    regex = dates.PATTERN
+
+    def to_python(self, value):
+        # A ValueError for days like 2023-02-31 means the route won't match.
+        if not dates.is_day(value):
+            raise ValueError(dates.MESSAGE)
+        return value
+
+    def to_url(self, value):
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+
+class YearConverter:
+    regex = r"20[2-9][0-9]"
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return "%04d" % int(value)
+
+
+class MonthConverter:
+    regex = r"0[1-9]|1[0-2]"
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return "%02d" % int(value)
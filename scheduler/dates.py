@@ -0,0 +1,52 @@
+"""
+Day ids: YYYY-MM-DD strings for real calendar days from 2020 to 2099, the
+`Date.date` values. One definition for URL dispatch, the model, the
+serializers and the bulk endpoints, cheap enough to run on every id of a
+batch (see benchmarks/validation.py).
+
+The pattern checks the shape and date.fromisoformat the calendar:
+fromisoformat alone also takes 20220701 and 2022-W26-5.
+"""
+
+import re
+from datetime import date
+
+from django.core.exceptions import ValidationError
+
+# For URL converters, which add their own anchors.
+PATTERN = r"20[2-9][0-9]-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])"
+
+# The first and last day ids.
+FIRST_DAY = date(2020, 1, 1)
+LAST_DAY = date(2099, 12, 31)
+
+MESSAGE = "Date must be a real day written YYYY-MM-DD, from 2020 to 2099."
+
+_match = re.compile(PATTERN).fullmatch
+
+
+def is_day(value):
+    """Whether `value` is a day id."""
+    if type(value) is not str or _match(value) is None:
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_day(value):
+    """The date for a day id. Raises ValueError for anything else."""
+    if type(value) is not str or _match(value) is None:
+        raise ValueError(MESSAGE)
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(MESSAGE) from None
+
+
+def validate_day(value):
+    """A model field validator for day ids."""
+    if not is_day(value):
+        raise ValidationError(MESSAGE, code="invalid")
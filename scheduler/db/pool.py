@@ -0,0 +1,91 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, size):
+    """Return the process-wide connection pool for a database alias."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = queue.LifoQueue(maxsize=size)
+        return pool
+
+
+def clear_pools():
+    """Close every pooled connection, e.g. after forking a worker."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                connection = pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Keeps raw DB-API connections in a process-wide pool instead of closing
+    them. Django's per-thread connection handling stays untouched: a
+    request checks a connection out on first use and hands it back when
+    Django closes it at the end of the request (CONN_MAX_AGE = 0), so
+    threads serving ASGI requests share a small set of open connections.
+    """
+
+    def get_pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL_SIZE", 10))
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        while True:
+            try:
+                connection = pool.get_nowait()
+            except queue.Empty:
+                return super().get_new_connection(conn_params)
+            if self.is_pooled_connection_usable(connection):
+                return connection
+            logger.debug(
+                "Discarding stale pooled connection", extra={"alias": self.alias}
+            )
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def is_pooled_connection_usable(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        try:
+            # Never hand an open transaction to the next borrower.
+            self.connection.rollback()
+            self.get_pool().put_nowait(self.connection)
+        except queue.Full:
+            super()._close()
+        except Exception:
+            # Broken connection, let the driver clean it up.
+            try:
+                super()._close()
+            except Exception:
+                pass
@@ -0,0 +1,139 @@
+"""
+Idempotency-Key support, so clients can retry a POST without it taking
+effect twice.
+
+The first request with a key runs, and its response is stored for
+IDEMPOTENCY_KEY_TTL. Retries with the same key from the same user get that
+response back, with an Idempotent-Replayed header, without running the view.
+A retry arriving while the first request still runs gets a 409, and the key
+sent with a different request gets a 422. Server errors are not stored, so
+those requests can be retried for real.
+"""
+
+import json
+from collections.abc import Mapping
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from rest_framework import status
+from rest_framework.response import Response
+
+from scheduler.models import IdempotencyKey
+
+SALT = "scheduler.idempotency"
+HEADER = "Idempotency-Key"
+REPLAYED = "Idempotent-Replayed"
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+def fingerprint(request):
+    # From the parsed data rather than the body, which differs between
+    # retries of the same form in its multipart boundary. Keyed with the
+    # SECRET_KEY, as the data can hold a password.
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    message = "\0".join(
+        [
+            request.method,
+            request.get_full_path(),
+            json.dumps(data, sort_keys=True, default=str),
+        ]
+    )
+    return salted_hmac(SALT, message, algorithm="sha256").hexdigest()
+
+
+def owner(request):
+    """
+    Whose keys a request uses: the user's, or for anonymous requests those
+    of the username they send, so unrelated clients don't share keys.
+    Anonymous owners are negative and never collide with user pks.
+    """
+    if request.user.is_authenticated:
+        return request.user.pk
+    data = request.data
+    username = data.get("username") if isinstance(data, Mapping) else None
+    if not isinstance(username, str):
+        return 0
+    digest = salted_hmac(SALT, username, algorithm="sha256").digest()
+    return -int.from_bytes(digest[:7], "big") - 1
+
+
+def claim(owner, key, fingerprint):
+    """
+    Store `key` as running and return it, or return None when it is stored
+    already. An expired key is claimed afresh.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    owner=owner, key=key, fingerprint=fingerprint
+                )
+        except IntegrityError:
+            cutoff = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+            expired = IdempotencyKey.objects.filter(
+                owner=owner, key=key, created__lt=cutoff
+            )
+            if not expired.delete()[0]:
+                return None
+    return None
+
+
+def replay(owner, key, fingerprint):
+    stored = IdempotencyKey.objects.filter(owner=owner, key=key).first()
+    if stored is None or stored.status is None:
+        return Response(
+            "A request with this Idempotency-Key is in progress",
+            status=status.HTTP_409_CONFLICT,
+        )
+    if stored.fingerprint != fingerprint:
+        return Response(
+            "This Idempotency-Key was used for another request",
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored.response, status=stored.status)
+    response[REPLAYED] = "true"
+    return response
+
+
+def idempotent(view):
+    """
+    Replay the stored response to POSTs repeating an Idempotency-Key header.
+    Requests without the header run as usual. Keys are per user, or per
+    username sent by anonymous requests.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                "Idempotency-Key must be 1 to %d characters" % MAX_KEY_LENGTH,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        key_owner = owner(request)
+        request_fingerprint = fingerprint(request)
+        stored = claim(key_owner, key, request_fingerprint)
+        if stored is None:
+            return replay(key_owner, key, request_fingerprint)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            stored.delete()
+            raise
+        if response.status_code >= 500:
+            stored.delete()
+        else:
+            IdempotencyKey.objects.filter(pk=stored.pk).update(
+                status=response.status_code, response=response.data
+            )
+        return response
+
+    return wrapper
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+
+class RequestSizeMiddleware:
+    """
+    Refuse request bodies over DATA_UPLOAD_MAX_MEMORY_SIZE with a 413 before
+    anything reads them. Django itself checks the limit only for form data
+    and request.body, and DRF's JSON parser reads the stream directly.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        length = request.META.get("CONTENT_LENGTH")
+        if limit is not None and length:
+            try:
+                too_large = int(length) > limit
+            except ValueError:
+                return HttpResponse("Invalid Content-Length", status=400)
+            if too_large:
+                return HttpResponse("Request body over %d bytes" % limit, status=413)
+        return self.get_response(request)
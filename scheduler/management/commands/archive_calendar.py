@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from scheduler.archive import archive_dates
+
+
+class Command(BaseCommand):
+    help = (
+        "Move dates before a year, with their notes and bookings, into the "
+        "archive table. Read endpoints still serve them from there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before", type=int, required=True, help="archive dates before YYYY"
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        archived = archive_dates(options["before"], options["batch_size"])
+        self.stdout.write("Archived %d dates before %d" % (archived, options["before"]))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scheduler.summaries import check_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the denormalized user_ids and note_count columns on Date "
+        "against the real bookings and notes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="repair mismatches")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatched = check_summaries(options["batch_size"], options["fix"])
+        for date_id in mismatched:
+            self.stdout.write("Mismatch: %s" % date_id)
+        self.stdout.write(
+            "%d dates %s"
+            % (len(mismatched), "fixed" if options["fix"] else "out of date")
+        )
@@ -0,0 +1,74 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from scheduler import tasks
+from scheduler.models import Task
+from scheduler.signals import task_queue_polled
+from scheduler.utils import delete_in_batches
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_thread(task_row):
+    try:
+        return tasks.run(task_row)
+    finally:
+        # Each pool thread has its own connection; don't leak them.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Run queued tasks from scheduler_task with a pool of threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="exit when no task is due"
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        timeout = timedelta(seconds=settings.TASKS_TIMEOUT)
+        retention = timedelta(seconds=settings.TASKS_RETENTION)
+        last_purge = 0.0
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while True:
+                close_old_connections()
+                tasks.requeue_stale(timeout)
+                depth = tasks.queue_depth()
+                task_queue_polled.send(sender=Task, depth=depth)
+                logger.debug("Task queue", extra={"depth": depth})
+
+                if time.monotonic() - last_purge > 3600:
+                    delete_in_batches(
+                        Task.objects.filter(
+                            status=Task.DONE, finished__lt=timezone.now() - retention
+                        )
+                    )
+                    last_purge = time.monotonic()
+
+                claimed = tasks.claim(threads) if depth else []
+                if claimed:
+                    statuses = list(pool.map(run_in_thread, claimed))
+                    self.stdout.write(
+                        "Ran %d tasks: %d done"
+                        % (len(statuses), statuses.count(Task.DONE))
+                    )
+                    continue
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
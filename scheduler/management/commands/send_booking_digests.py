@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from scheduler.notifications import send_booking_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Email each user one digest of recent booking changes on their dates. "
+        "Run on a schedule, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=5000, help="events handled per run"
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="hand the run to the task queue instead of sending here",
+        )
+
+    def handle(self, *args, **options):
+        if options["queue"]:
+            send_booking_digests.delay(options["limit"])
+            self.stdout.write("Queued booking digests")
+            return
+        sent = send_booking_digests(options["limit"])
+        self.stdout.write("Sent %d booking digests" % sent)
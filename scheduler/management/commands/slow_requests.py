@@ -0,0 +1,107 @@
+import json
+import math
+import sys
+
+from django.core.management.base import BaseCommand
+
+from scheduler.sampling import MESSAGE
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list of samples."""
+    return samples[max(0, math.ceil(pct / 100.0 * len(samples)) - 1)]
+
+
+def read_records(files):
+    for lines in files:
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("message") == MESSAGE:
+                yield record
+
+
+def aggregate(records):
+    """
+    Group slow request records by method and route. Returns
+    ({(method, route): [records]}, {sql: [count, total ms]}).
+    """
+    routes = {}
+    statements = {}
+    for record in records:
+        routes.setdefault((record["method"], record["route"]), []).append(record)
+        for query in record.get("queries", ()):
+            totals = statements.setdefault(query["sql"], [0, 0.0])
+            totals[0] += 1
+            totals[1] += query["ms"]
+    return routes, statements
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the records logged by scheduler.sampling: the slowest "
+        "routes and the SQL that took the most time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "logs", nargs="*", help="JSON log files, standard input if none"
+        )
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument(
+            "--by",
+            choices=["total", "p95", "count"],
+            default="total",
+            help="how to rank routes",
+        )
+
+    def handle(self, *args, **options):
+        if options["logs"]:
+            files = [open(path) for path in options["logs"]]
+        else:
+            files = [sys.stdin]
+        try:
+            routes, statements = aggregate(read_records(files))
+        finally:
+            for lines in files:
+                if lines is not sys.stdin:
+                    lines.close()
+
+        rows = []
+        for (method, route), records in routes.items():
+            times = sorted(record["ms"] for record in records)
+            rows.append(
+                {
+                    "route": "%s %s" % (method, route),
+                    "count": len(times),
+                    "total": sum(times),
+                    "p50": percentile(times, 50),
+                    "p95": percentile(times, 95),
+                    "max": times[-1],
+                    "queries": sum(r["query_count"] for r in records) / len(records),
+                }
+            )
+        rows.sort(key=lambda row: row[options["by"]], reverse=True)
+        self.stdout.write(
+            "%-40s %6s %10s %10s %10s %8s"
+            % ("route", "count", "p50 ms", "p95 ms", "max ms", "queries")
+        )
+        for row in rows[: options["top"]]:
+            self.stdout.write(
+                "%-40s %6d %10.1f %10.1f %10.1f %8.1f"
+                % (
+                    row["route"],
+                    row["count"],
+                    row["p50"],
+                    row["p95"],
+                    row["max"],
+                    row["queries"],
+                )
+            )
+
+        self.stdout.write("\n%6s %10s  %s" % ("count", "total ms", "sql"))
+        top = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)
+        for sql, (count, total) in top[: options["top"]]:
+            self.stdout.write("%6d %10.1f  %s" % (count, total, sql))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from scheduler.models import IdempotencyKey
+from scheduler.utils import delete_in_batches
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="seconds to sleep between batches",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        # Range scan on the created index.
+        expired = IdempotencyKey.objects.filter(created__lt=cutoff)
+        deleted = delete_in_batches(expired, options["batch_size"], options["pause"])
+        self.stdout.write("Deleted %d expired idempotency keys" % deleted)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from scheduler.utils import delete_in_batches
+
+
+class Command(BaseCommand):
+    help = "Delete expired authentication tokens in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="seconds to sleep between batches",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.TOKEN_TTL
+        # Range scan on the index added in scheduler migration 0002.
+        expired = Token.objects.filter(created__lt=cutoff)
+        deleted = delete_in_batches(expired, options["batch_size"], options["pause"])
+        self.stdout.write("Deleted %d expired tokens" % deleted)
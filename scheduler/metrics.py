@@ -0,0 +1,319 @@
+"""
+Prometheus metrics for the API, served in the text format at /metrics.
+
+Metrics live in this process behind one lock, so updating one costs a
+dict lookup. With several worker processes, set METRICS_DIR to a directory
+they share: each process writes a snapshot of its metrics there at most
+every METRICS_FLUSH_SECONDS, and /metrics adds up every snapshot, those
+of exited processes included so counters never go backwards. Clear the
+directory when deploying.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from scheduler.signals import (
+    cache_accessed,
+    login_attempted,
+    namespace_changed,
+    request_coalesced,
+    request_throttled,
+    task_finished,
+    task_queue_polled,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Tasks wait for a worker to poll, and for retries.
+LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        # {label values: value}
+        self.values = {}
+        _metrics[name] = self
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def merge(self, values, labels, value):
+        """Add a snapshot's `value` to `values`."""
+        values[labels] = values.get(labels, 0) + value
+
+    def samples(self, labels, value):
+        yield self.name, labels, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        with _lock:
+            self.values[labels] = value
+
+    def merge(self, values, labels, value):
+        # Snapshots merge oldest first, so the latest reading wins.
+        values[labels] = value
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        with _lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                # One count per bucket and +Inf, not cumulative, then the sum.
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def merge(self, values, labels, value):
+        counts = values.setdefault(labels, [0] * len(value))
+        for position, count in enumerate(value):
+            counts[position] += count
+
+    def samples(self, labels, value):
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), value):
+            total += count
+            yield self.name + "_bucket", labels + (("le", str(bound)),), total
+        yield self.name + "_sum", labels, value[-1]
+        yield self.name + "_count", labels, total
+
+
+request_duration = Histogram(
+    "scheduler_request_duration_seconds",
+    "Time to serve API requests.",
+    ("route", "method"),
+)
+requests = Counter(
+    "scheduler_requests_total", "API responses.", ("route", "method", "status")
+)
+db_queries = Counter(
+    "scheduler_db_queries_total", "Database queries made by API requests.", ("route",)
+)
+db_query_seconds = Counter(
+    "scheduler_db_query_seconds_total",
+    "Time API requests spent in database queries.",
+    ("route",),
+)
+logins = Counter(
+    "scheduler_logins_total",
+    "Login attempts: token (reused), password or failed.",
+    ("outcome",),
+)
+cache_requests = Counter(
+    "scheduler_cache_requests_total",
+    "Lookups in the month cache, property cache and calendar index.",
+    ("cache", "result"),
+)
+namespace_changes = Counter(
+    "scheduler_cache_namespace_changes_total",
+    "Properties moved to a new cache namespace by this process.",
+)
+coalesced = Counter(
+    "scheduler_requests_coalesced_total",
+    "Requests served from an identical request in flight.",
+)
+throttled = Counter(
+    "scheduler_requests_throttled_total", "Requests rate limited.", ("scope",)
+)
+tasks = Counter("scheduler_tasks_total", "Task attempts.", ("name", "status"))
+task_duration = Histogram(
+    "scheduler_task_duration_seconds", "Time running task attempts.", ("name",)
+)
+task_latency = Histogram(
+    "scheduler_task_latency_seconds",
+    "Time from enqueueing tasks to their attempts finishing.",
+    ("name",),
+    buckets=LATENCY_BUCKETS,
+)
+task_queue_depth = Gauge("scheduler_task_queue_depth", "Tasks waiting to run.")
+
+_snapshot_name = "%d-%d.json" % (os.getpid(), time.time_ns())
+_flushed = 0.0
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: [[list(labels), value] for labels, value in metric.values.items()]
+            for name, metric in _metrics.items()
+        }
+
+
+def flush(force=False):
+    """Write this process's snapshot to METRICS_DIR, if it is time to."""
+    global _flushed
+    directory = settings.METRICS_DIR
+    now = time.monotonic()
+    if not directory or (not force and now - _flushed < settings.METRICS_FLUSH_SECONDS):
+        return
+    _flushed = now
+    data = json.dumps({"time": time.time(), "metrics": snapshot()})
+    # Written aside and renamed, so readers never see half a snapshot.
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(descriptor, "w") as file:
+        file.write(data)
+    os.replace(path, os.path.join(directory, _snapshot_name))
+
+
+def merged():
+    """Every process's metrics, as {name: {label values: value}}."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        with _lock:
+            return {
+                name: {
+                    labels: list(value) if isinstance(value, list) else value
+                    for labels, value in metric.values.items()
+                }
+                for name, metric in _metrics.items()
+            }
+    flush(force=True)
+    snapshots = []
+    for filename in os.listdir(directory):
+        if filename.endswith(".json"):
+            try:
+                with open(os.path.join(directory, filename)) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+    totals = {name: {} for name in _metrics}
+    for data in sorted(snapshots, key=lambda data: data["time"]):
+        for name, values in data["metrics"].items():
+            metric = _metrics.get(name)
+            if metric is None:
+                continue
+            for labels, value in values:
+                metric.merge(totals[name], tuple(labels), value)
+    return totals
+
+
+def escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def render():
+    lines = []
+    for name, values in merged().items():
+        metric = _metrics[name]
+        lines.append("# HELP %s %s" % (name, metric.help))
+        lines.append("# TYPE %s %s" % (name, metric.kind))
+        for labels, value in sorted(values.items()):
+            pairs = tuple(zip(metric.labels, labels))
+            for sample, sample_labels, sample_value in metric.samples(pairs, value):
+                if sample_labels:
+                    sample += "{%s}" % ",".join(
+                        '%s="%s"' % (label, escape(text))
+                        for label, text in sample_labels
+                    )
+                lines.append("%s %s" % (sample, float(sample_value)))
+    return "\n".join(lines) + "\n"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Records every request answered by a view in scheduler.views."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        # Only our routes, so unknown paths can't grow the label sets.
+        if match is not None and match.func.__module__ == "scheduler.views":
+            route, method = match.route, request.method
+            request_duration.observe(duration, route, method)
+            requests.inc(route, method, str(response.status_code))
+            db_queries.inc(route, amount=queries.count)
+            db_query_seconds.inc(route, amount=queries.seconds)
+        flush()
+        return response
+
+
+def login_attempt(sender, outcome, **kwargs):
+    logins.inc(outcome)
+
+
+def cache_access(sender, cache, hit, **kwargs):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def namespace_change(sender, **kwargs):
+    namespace_changes.inc()
+
+
+def request_coalesce(sender, **kwargs):
+    coalesced.inc()
+
+
+def request_throttle(sender, scope, **kwargs):
+    throttled.inc(scope)
+
+
+def task_finish(sender, name, status, duration, latency, **kwargs):
+    tasks.inc(name, status)
+    task_duration.observe(duration, name)
+    task_latency.observe(latency, name)
+    flush()
+
+
+def task_queue_poll(sender, depth, **kwargs):
+    task_queue_depth.set(value=depth)
+    flush()
+
+
+def connect():
+    login_attempted.connect(login_attempt)
+    cache_accessed.connect(cache_access)
+    namespace_changed.connect(namespace_change)
+    request_coalesced.connect(request_coalesce)
+    request_throttled.connect(request_throttle)
+    task_finished.connect(task_finish)
+    task_queue_polled.connect(task_queue_poll)
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+INDEX = models.Index(fields=["created"], name="authtoken_token_created_idx")
+
+
+def add_index(apps, schema_editor):
+    Token = apps.get_model("authtoken", "Token")
+    schema_editor.add_index(Token, INDEX)
+
+
+def remove_index(apps, schema_editor):
+    Token = apps.get_model("authtoken", "Token")
+    schema_editor.remove_index(Token, INDEX)
+
+
+class Migration(migrations.Migration):
+    """
+    Index authtoken_token.created for the expired token sweep. The Token
+    model belongs to rest_framework.authtoken, so the index is created here
+    rather than declared on the model.
+    """
+
+    dependencies = [
+        ("scheduler", "0001_initial"),
+        ("authtoken", "0003_tokenproxy"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduler", "0002_token_created_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedDate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.CharField(max_length=10, unique=True)),
+                ("data", models.JSONField()),
+                ("archived", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
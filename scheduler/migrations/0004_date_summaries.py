@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_summaries(apps, schema_editor):
+    Date = apps.get_model("scheduler", "Date")
+    user_ids = {}
+    for date_id, user_id in Date.users.through.objects.order_by(
+        "date_id", "user_id"
+    ).values_list("date_id", "user_id"):
+        user_ids.setdefault(date_id, []).append(user_id)
+    for date in Date.objects.annotate(count=Count("notes")).iterator():
+        Date.objects.filter(pk=date.pk).update(
+            user_ids=user_ids.get(date.pk, []), note_count=date.count
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduler", "0003_archiveddate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="date",
+            name="modified",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="date",
+            name="note_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="date",
+            name="user_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,259 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def create_default_property(apps, schema_editor):
+    Property = apps.get_model("scheduler", "Property")
+    slug = settings.DEFAULT_PROPERTY
+    Property.objects.using(schema_editor.connection.alias).get_or_create(
+        slug=slug, defaults={"name": slug}
+    )
+
+
+def set_default_property(apps, schema_editor):
+    """Put existing archived dates, events and rules in the default property."""
+    Property = apps.get_model("scheduler", "Property")
+    db = schema_editor.connection.alias
+    default = Property.objects.using(db).get(slug=settings.DEFAULT_PROPERTY)
+    for name in ("ArchivedDate", "BookingEvent", "RecurringBooking"):
+        model = apps.get_model("scheduler", name)
+        model.objects.using(db).update(property=default)
+
+
+def copy_dates(apps, schema_editor):
+    """
+    Copy every LegacyDate into the default property, then point bookings and
+    notes at the copies.
+    """
+    Property = apps.get_model("scheduler", "Property")
+    LegacyDate = apps.get_model("scheduler", "LegacyDate")
+    Date = apps.get_model("scheduler", "Date")
+    Note = apps.get_model("scheduler", "Note")
+    db = schema_editor.connection.alias
+    default = Property.objects.using(db).get(slug=settings.DEFAULT_PROPERTY)
+
+    Date.objects.using(db).bulk_create(
+        [
+            Date(
+                property=default,
+                date=legacy.date,
+                user_ids=legacy.user_ids,
+                note_count=legacy.note_count,
+            )
+            for legacy in LegacyDate.objects.using(db).order_by("pk").iterator()
+        ],
+        batch_size=1000,
+    )
+    # Not every backend returns primary keys from bulk_create.
+    ids = dict(
+        Date.objects.using(db).filter(property=default).values_list("date", "pk")
+    )
+
+    Booking = Date.users.through
+    Booking.objects.using(db).bulk_create(
+        [
+            Booking(date_id=ids[date], user_id=user_id)
+            for date, user_id in LegacyDate.users.through.objects.using(db)
+            .values_list("legacydate_id", "user_id")
+            .iterator()
+        ],
+        batch_size=1000,
+    )
+    Note.objects.using(db).update(
+        new_date=Subquery(
+            Date.objects.filter(property=default, date=OuterRef("date_id")).values(
+                "pk"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Dates move from a global YYYY-MM-DD primary key to an id, unique per
+    property. Existing data is copied into the DEFAULT_PROPERTY. Not
+    reversible.
+    """
+
+    dependencies = [
+        ("scheduler", "0007_recurringbooking"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Property",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slug", models.SlugField(unique=True)),
+                ("name", models.CharField(max_length=100)),
+            ],
+            options={
+                "verbose_name_plural": "properties",
+            },
+        ),
+        migrations.RunPython(create_default_property, migrations.RunPython.noop),
+        migrations.RenameModel("Date", "LegacyDate"),
+        migrations.CreateModel(
+            name="Date",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "date",
+                    models.CharField(
+                        max_length=10,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^20[2-9][0-9]-[0-1][0-9]-[0-3][0-9]$",
+                                message="Date must be YYYY-MM-DD, after 2020.",
+                            )
+                        ],
+                    ),
+                ),
+                ("user_ids", models.JSONField(blank=True, default=list)),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "property",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dates",
+                        to="scheduler.property",
+                    ),
+                ),
+                ("users", models.ManyToManyField(to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("property", "date"),
+                        name="scheduler_date_property_date",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="note",
+            name="new_date",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="scheduler.date",
+            ),
+        ),
+        migrations.RunPython(copy_dates),
+        migrations.RemoveField(model_name="note", name="date"),
+        migrations.RenameField(model_name="note", old_name="new_date", new_name="date"),
+        migrations.AlterField(
+            model_name="note",
+            name="date",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notes",
+                to="scheduler.date",
+            ),
+        ),
+        migrations.DeleteModel(name="LegacyDate"),
+        migrations.AddField(
+            model_name="archiveddate",
+            name="property",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="archiveddate",
+            name="date",
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name="archiveddate",
+            constraint=models.UniqueConstraint(
+                fields=("property", "date"),
+                name="scheduler_archiveddate_property_date",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookingevent",
+            name="property",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recurringbooking",
+            name="property",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.RunPython(set_default_property),
+        migrations.AlterField(
+            model_name="archiveddate",
+            name="property",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bookingevent",
+            name="property",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recurringbooking",
+            name="property",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="scheduler.property",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="recurringbooking",
+            name="scheduler_r_dtstart_92ab3a_idx",
+        ),
+        migrations.AddIndex(
+            model_name="recurringbooking",
+            index=models.Index(
+                fields=["property", "dtstart", "until"],
+                name="scheduler_r_propert_c02693_idx",
+            ),
+        ),
+    ]
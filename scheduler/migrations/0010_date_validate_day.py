@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:08
+
+import scheduler.dates
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduler", "0009_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="date",
+            name="date",
+            field=models.CharField(
+                max_length=10, validators=[scheduler.dates.validate_day]
+            ),
+        ),
+    ]
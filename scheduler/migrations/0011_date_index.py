@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduler", "0010_date_validate_day"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="date",
+            index=models.Index(fields=["date"], name="scheduler_date_date_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduler", "0011_date_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="bookingevent",
+            name="scheduler_b_digeste_649739_idx",
+        ),
+        migrations.RemoveField(
+            model_name="bookingevent",
+            name="digested",
+        ),
+    ]
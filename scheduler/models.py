@@ -1,24 +1,65 @@
-from django.core.validators import RegexValidator
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from scheduler.dates import validate_day
 
 # User is just AbstractUser
 
 
+class Property(models.Model):
+    """A cottage with its own calendar. URLs address it by slug."""
+
+    slug = models.SlugField(unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name_plural = "properties"
+
+    def __str__(self):
+        return self.name
+
+
+def default_property():
+    """
+    The pk of the DEFAULT_PROPERTY, which the unscoped routes serve,
+    created on first use. Use the cached scheduler.properties.property_id.
+    """
+    slug = settings.DEFAULT_PROPERTY
+    return Property.objects.get_or_create(slug=slug, defaults={"name": slug})[0].pk
+
+
 class Date(models.Model):
-    date = models.CharField(
-        primary_key=True,
-        unique=True,
-        max_length=10,
-        validators=[
-            # Needs validation before insert to remove invalid dates
-            RegexValidator(
-                r"^20[2-9][0-9]-[0-1][0-9]-[0-3][0-9]$",
-                message="Date must be YYYY-MM-DD, after 2020.",
-            )
-        ],
+    property = models.ForeignKey(
+        Property,
+        related_name="dates",
+        on_delete=models.CASCADE,
+        # Covered by the (property, date) constraint.
+        db_index=False,
     )
+    # A real day, not only YYYY-MM-DD shaped.
+    date = models.CharField(max_length=10, validators=[validate_day])
     users = models.ManyToManyField(User)
+    # Denormalized from users and notes by scheduler.summaries so the month
+    # view reads a single table. `manage.py check_date_summaries` verifies.
+    user_ids = models.JSONField(default=list, blank=True)
+    note_count = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Also the index for every per-property date and month lookup.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "date"], name="scheduler_date_property_date"
+            )
+        ]
+        # For the admin, which lists, orders and searches every property's
+        # dates at once.
+        indexes = [models.Index(fields=["date"], name="scheduler_date_date_idx")]
+
+    def __str__(self):
+        return self.date
 
 
 class Note(models.Model):
@@ -26,5 +67,168 @@ class Note(models.Model):
     date = models.ForeignKey(Date, related_name="notes", on_delete=models.CASCADE)
     message = models.CharField(max_length=256)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        # Lets the summary receivers notice a note moving to another date.
+        note._loaded_date_id = note.__dict__.get("date_id")
+        return note
+
+    def __str__(self):
+        return self.date.date + " -> " + '"' + str(self.message) + '"'
+
+
+class ArchivedDate(models.Model):
+    """
+    A Date from a past season moved out of the live tables by
+    `manage.py archive_calendar`, frozen as its DateSerializer output.
+    """
+
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    date = models.CharField(max_length=10)
+    data = models.JSONField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "date"], name="scheduler_archiveddate_property_date"
+            )
+        ]
+
+    def __str__(self):
+        return self.date
+
+
+class Task(models.Model):
+    """A queued call to a function registered with `scheduler.tasks.task`."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"])]
+
+    def __str__(self):
+        return "%s #%s (%s)" % (self.name, self.pk, self.status)
+
+
+class BookingEvent(models.Model):
+    """
+    A user booked onto or removed from a date, waiting to be included in
+    booking digests for the other users on that date.
+    """
+
+    ADDED = "added"
+    REMOVED = "removed"
+    ACTIONS = [(ADDED, "Added"), (REMOVED, "Removed")]
+
+    property = models.ForeignKey(Property, on_delete=models.CASCADE)
+    # The day rather than a foreign key, so events outlive deleted dates.
+    date = models.CharField(max_length=10)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return "%s %s %s" % (self.user_id, self.action, self.date)
+
+
+class RecurringBooking(models.Model):
+    """
+    A user booked on a repeating schedule, like every weekend in July.
+    Occurrences are never stored; `scheduler.recurrence` expands them on
+    read. Editing or deleting an occurrence turns it into a concrete `Date`
+    and adds it to `exdates`.
+    """
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    YEARLY = "yearly"
+    FREQUENCIES = [
+        (DAILY, "Daily"),
+        (WEEKLY, "Weekly"),
+        (MONTHLY, "Monthly"),
+        (YEARLY, "Yearly"),
+    ]
+    # Bounds for rules from the API.
+    MAX_INTERVAL = 366
+    MAX_COUNT = 10000
+
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    freq = models.CharField(max_length=10, choices=FREQUENCIES)
+    interval = models.PositiveIntegerField(default=1)
+    # Weekdays, 0 is Monday, for weekly rules. Defaults to dtstart's weekday.
+    byweekday = models.JSONField(default=list, blank=True)
+    dtstart = models.DateField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    # YYYY-MM-DD occurrences that were edited or removed.
+    exdates = models.JSONField(default=list, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["property", "dtstart", "until"])]
+
+    def __str__(self):
+        return "%s %s from %s" % (self.user_id, self.freq, self.dtstart)
+
+
+class IdempotencyKey(models.Model):
+    """
+    The first response to a POST sent with an Idempotency-Key header,
+    replayed to retries by `scheduler.idempotency.idempotent`. Kept for
+    IDEMPOTENCY_KEY_TTL; `manage.py sweep_idempotency_keys` deletes the rest.
+    """
+
+    # The user's pk. Anonymous requests get a negative number from the
+    # username they send, or 0. Not a foreign key: rows are short-lived, so
+    # there is nothing to cascade.
+    owner = models.BigIntegerField()
+    key = models.CharField(max_length=255)
+    # HMAC-SHA256 of the method, path and data: a key reused for another
+    # request is refused rather than answered with the wrong response.
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request is still running.
+    status = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "key"], name="scheduler_idempotencykey_owner_key"
+            )
+        ]
+
     def __str__(self):
-        return str(self.date) + " -> " + '"' + str(self.message) + '"'
+        return "%s %s" % (self.owner, self.key)
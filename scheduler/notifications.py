@@ -0,0 +1,150 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models.signals import m2m_changed
+
+from scheduler.models import BookingEvent, Date
+from scheduler.tasks import task
+
+ACTIONS = {"post_add": BookingEvent.ADDED, "post_remove": BookingEvent.REMOVED}
+
+
+def bookings_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Record booking events; sending happens later, off the request path."""
+    if action == "pre_clear":
+        if reverse:
+            pairs = instance.date_set.values_list("pk", flat=True)
+        else:
+            pairs = instance.users.values_list("pk", flat=True)
+        instance._cleared_booking_pks = list(pairs)
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_booking_pks", [])
+        event_action = BookingEvent.REMOVED
+    elif action in ACTIONS:
+        event_action = ACTIONS[action]
+    else:
+        return
+
+    if reverse:
+        dates = Date.objects.filter(pk__in=pk_set).values_list("property_id", "date")
+        events = [
+            BookingEvent(
+                property_id=property_id,
+                date=date,
+                user_id=instance.pk,
+                action=event_action,
+            )
+            for property_id, date in dates
+        ]
+    else:
+        events = [
+            BookingEvent(
+                property_id=instance.property_id,
+                date=instance.date,
+                user_id=user_id,
+                action=event_action,
+            )
+            for user_id in pk_set
+        ]
+    BookingEvent.objects.bulk_create(events)
+
+
+def connect():
+    m2m_changed.connect(bookings_changed, sender=Date.users.through)
+
+
+def build_digests(events):
+    """
+    Group events into one digest per user booked on the same days of the
+    same property, leaving out each user's own changes. Returns
+    {user_id: [event, ...]}.
+    """
+    booked = defaultdict(set)
+    for property_id in {event.property_id for event in events}:
+        rows = Date.users.through.objects.filter(
+            date__property_id=property_id,
+            date__date__in={
+                event.date for event in events if event.property_id == property_id
+            },
+        ).values_list("date__date", "user_id")
+        for date, user_id in rows:
+            booked[property_id, date].add(user_id)
+
+    digests = defaultdict(list)
+    for event in events:
+        for user_id in booked[event.property_id, event.date] - {event.user_id}:
+            digests[user_id].append(event)
+    return digests
+
+
+def render_digest(recipient, events):
+    lines = [
+        "%s %s %s at %s"
+        % (
+            event.user.get_username(),
+            "booked" if event.action == BookingEvent.ADDED else "cancelled",
+            event.date,
+            event.property.name,
+        )
+        for event in sorted(events, key=lambda event: (event.date, event.created))
+    ]
+    return EmailMessage(
+        subject="Cottage calendar: %d change%s on your dates"
+        % (len(lines), "" if len(lines) == 1 else "s"),
+        body="Hi %s,\n\n%s\n" % (recipient.get_username(), "\n".join(lines)),
+        to=[recipient.email],
+    )
+
+
+@task(name="scheduler.send_booking_digests")
+def send_booking_digests(limit=5000):
+    """
+    Email every user a single digest of the booking changes on dates they
+    are booked on, sending through one connection in batches of
+    DIGEST_BATCH_SIZE. Each event is deleted once every digest it is in has
+    been sent, so a failure partway through leaves only the unsent ones to
+    retry. Returns the number of emails sent.
+    """
+    events = list(
+        BookingEvent.objects.select_related("user", "property").order_by(
+            "created", "pk"
+        )[:limit]
+    )
+    if not events:
+        return 0
+    digests = build_digests(events)
+    recipients = User.objects.in_bulk(digests.keys())
+    messages = [
+        (user_id, render_digest(recipients[user_id], user_events))
+        for user_id, user_events in digests.items()
+        if recipients[user_id].email
+    ]
+    # The recipients each event is still waiting on.
+    waiting = {event.pk: set() for event in events}
+    for user_id, _ in messages:
+        for event in digests[user_id]:
+            waiting[event.pk].add(user_id)
+    # Nobody else is booked on its day, or nobody with an address.
+    BookingEvent.objects.filter(
+        pk__in=[pk for pk, user_ids in waiting.items() if not user_ids]
+    ).delete()
+
+    # No transaction is held open while talking to the mail server.
+    batch_size = settings.DIGEST_BATCH_SIZE
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(messages), batch_size):
+            batch = messages[start : start + batch_size]
+            sent += connection.send_messages([message for _, message in batch]) or 0
+            done = []
+            for user_id, _ in batch:
+                for event in digests[user_id]:
+                    waiting[event.pk].discard(user_id)
+                    if not waiting[event.pk]:
+                        done.append(event.pk)
+            if done:
+                BookingEvent.objects.filter(pk__in=done).delete()
+    return sent
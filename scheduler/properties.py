@@ -0,0 +1,134 @@
+"""
+Resolving property slugs and per-property cache namespaces.
+
+Every cache entry holding a property's bookings is keyed under
+`namespace(property_id)`. Any change to that property's dates, bookings,
+notes or recurring rules moves it to a new namespace, so other properties
+keep their cached data and nothing has to be deleted key by key.
+"""
+
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.http import Http404
+
+from scheduler.models import Date, Note, Property, RecurringBooking, default_property
+from scheduler.signals import cache_accessed, namespace_changed
+
+SLUG_KEY = "property-slug:%s"
+VERSION_KEY = "property-version:%s"
+
+
+def property_id(slug=None):
+    """
+    The pk of the property with `slug`, or of the DEFAULT_PROPERTY. Cached,
+    so scoped requests don't pay for a lookup. Raises Property.DoesNotExist.
+    """
+    slug = slug or settings.DEFAULT_PROPERTY
+    pk = cache.get(SLUG_KEY % slug)
+    cache_accessed.send(sender=Property, cache="property", hit=pk is not None)
+    if pk is None:
+        if slug == settings.DEFAULT_PROPERTY:
+            pk = default_property()
+        else:
+            pk = Property.objects.values_list("pk", flat=True).get(slug=slug)
+        cache.set(SLUG_KEY % slug, pk, None)
+    return pk
+
+
+def scoped(view):
+    """
+    Resolve a view's `slug` URL kwarg, absent on the unscoped routes, into a
+    `property_id` kwarg. Unknown slugs are a 404.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, slug=None, **kwargs):
+        try:
+            kwargs["property_id"] = property_id(slug)
+        except Property.DoesNotExist:
+            raise Http404("No such property")
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def version(property_id):
+    """The current version of a property's namespace."""
+    # Versions start from the clock, so a version evicted from the cache is
+    # never handed out again while entries made under it are still live.
+    return cache.get_or_set(VERSION_KEY % property_id, time.time_ns, None)
+
+
+def namespace(property_id):
+    """The prefix for cache keys holding a property's data."""
+    return "property:%s:%s" % (property_id, version(property_id))
+
+
+def invalidate(property_id):
+    """Move a property to a new namespace once the transaction commits."""
+
+    def bump():
+        try:
+            new_version = cache.incr(VERSION_KEY % property_id)
+        except ValueError:
+            # No version yet, so nothing is cached under one either.
+            return
+        namespace_changed.send(
+            sender=Property, property_id=property_id, version=new_version
+        )
+
+    transaction.on_commit(bump)
+
+
+def slug_changing(sender, instance, raw=False, **kwargs):
+    # A renamed property must not stay reachable under its old slug.
+    if instance.pk and not raw:
+        old = Property.objects.filter(pk=instance.pk).values_list("slug", flat=True)
+        cache.delete_many([SLUG_KEY % slug for slug in old])
+
+
+def property_deleted(sender, instance, **kwargs):
+    cache.delete(SLUG_KEY % instance.slug)
+
+
+def row_changed(sender, instance, **kwargs):
+    invalidate(instance.property_id)
+
+
+def note_changed(sender, instance, **kwargs):
+    # Gone already when the note is deleted along with its date.
+    for pk in Date.objects.filter(pk=instance.date_id).values_list(
+        "property_id", flat=True
+    ):
+        invalidate(pk)
+
+
+def bookings_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        invalidate(instance.property_id)
+        return
+    dates = instance.date_set.all() if action == "pre_clear" else pk_set
+    for pk in (
+        Date.objects.filter(pk__in=dates)
+        .values_list("property_id", flat=True)
+        .distinct()
+    ):
+        invalidate(pk)
+
+
+def connect():
+    pre_save.connect(slug_changing, sender=Property)
+    post_delete.connect(property_deleted, sender=Property)
+    for model in (Date, RecurringBooking):
+        post_save.connect(row_changed, sender=model)
+        post_delete.connect(row_changed, sender=model)
+    post_save.connect(note_changed, sender=Note)
+    post_delete.connect(note_changed, sender=Note)
+    m2m_changed.connect(bookings_changed, sender=Date.users.through)
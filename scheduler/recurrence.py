@@ -0,0 +1,176 @@
+"""
+Expands `RecurringBooking` rules into booked days on read.
+
+Rules are walked with generators, so reading a month of a series that
+runs for years only generates the days around that month.
+"""
+
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import count as counter
+
+from django.db import transaction
+
+from scheduler.models import Date, RecurringBooking
+
+
+def _months_between(first, second):
+    return (second.year - first.year) * 12 + second.month - first.month
+
+
+def _candidates(rule, since):
+    """
+    Yield the days `rule` produces, ignoring until, count and exdates.
+    Starts at the first period on or before `since` rather than dtstart, and
+    stops at date.max.
+    """
+    start = rule.dtstart
+    step = rule.interval
+    since = max(since, start)
+
+    if rule.freq == RecurringBooking.DAILY:
+        day = start + timedelta(days=(since - start).days // step * step)
+        while True:
+            yield day
+            try:
+                day += timedelta(days=step)
+            except OverflowError:
+                return
+
+    elif rule.freq == RecurringBooking.WEEKLY:
+        weekdays = sorted(set(rule.byweekday)) or [start.weekday()]
+        first_week = start - timedelta(days=start.weekday())
+        weeks = (since - first_week).days // 7 // step * step
+        week = first_week + timedelta(weeks=weeks)
+        while True:
+            for weekday in weekdays:
+                try:
+                    day = week + timedelta(days=weekday)
+                except OverflowError:
+                    return
+                if day >= start:
+                    yield day
+            try:
+                week += timedelta(weeks=step)
+            except OverflowError:
+                return
+
+    elif rule.freq == RecurringBooking.MONTHLY:
+        skip = _months_between(start, since) // step * step
+        for months in counter(skip, step):
+            year, month = divmod(start.month - 1 + months, 12)
+            year, month = start.year + year, month + 1
+            if year > date.max.year:
+                return
+            # Months without the day, like the 31st, are skipped.
+            if start.day <= monthrange(year, month)[1]:
+                yield date(year, month, start.day)
+
+    elif rule.freq == RecurringBooking.YEARLY:
+        skip = (since.year - start.year) // step * step
+        for years in counter(skip, step):
+            if start.year + years > date.max.year:
+                return
+            try:
+                yield start.replace(year=start.year + years)
+            except ValueError:
+                # February 29th outside a leap year.
+                continue
+
+
+def occurrences(rule, start, end):
+    """Yield the days `rule` books between start and end inclusive."""
+    exdates = set(rule.exdates)
+    # A count is numbered from dtstart, so those rules cannot skip ahead.
+    since = start if rule.count is None else rule.dtstart
+    for number, day in enumerate(_candidates(rule, since), 1):
+        if day > end or (rule.until and day > rule.until):
+            return
+        if rule.count is not None and number > rule.count:
+            return
+        if day >= start and day.isoformat() not in exdates:
+            yield day
+        # Done, without computing a candidate past the end.
+        if day >= end or day == rule.until or number == rule.count:
+            return
+
+
+def rules_between(property_id, start, end):
+    return RecurringBooking.objects.filter(
+        property_id=property_id, dtstart__lte=end
+    ).exclude(until__lt=start)
+
+
+def booked_between(property_id, start, end):
+    """Map each YYYY-MM-DD between start and end to its recurring user ids."""
+    days = defaultdict(set)
+    for rule in rules_between(property_id, start, end):
+        for day in occurrences(rule, start, end):
+            days[day.isoformat()].add(rule.user_id)
+    return days
+
+
+def booked_on(property_id, date_id):
+    """The user ids with a recurring booking on `date_id`."""
+    day = date.fromisoformat(date_id)
+    return booked_between(property_id, day, day).get(date_id, set())
+
+
+def booked_on_days(property_id, date_ids):
+    """Map each of `date_ids` with recurring bookings to their user ids."""
+    days = sorted({date.fromisoformat(date_id) for date_id in date_ids})
+    booked = defaultdict(set)
+    if not days:
+        return booked
+    for rule in rules_between(property_id, days[0], days[-1]):
+        for day in days:
+            if next(occurrences(rule, day, day), None):
+                booked[day.isoformat()].add(rule.user_id)
+    return booked
+
+
+def merge_dates(property_id, dates, start, end):
+    """
+    Add recurring bookings to concrete `Date`s, as read by
+    `DateMonthSerializer`. Days with only recurring bookings become unsaved
+    `Date`s; nothing is written.
+    """
+    recurring = booked_between(property_id, start, end)
+    merged = {}
+    for day in dates:
+        extra = recurring.pop(day.date, None)
+        if extra:
+            day.user_ids = sorted(extra.union(day.user_ids))
+        merged[day.date] = day
+    for day, user_ids in recurring.items():
+        merged[day] = Date(
+            property_id=property_id,
+            date=day,
+            user_ids=sorted(user_ids),
+            note_count=0,
+        )
+    return [merged[day] for day in sorted(merged)]
+
+
+def materialize(property_id, date_id):
+    """
+    Store the recurring bookings on `date_id` as a concrete `Date` and
+    exclude the day from their rules, so it can be edited like any other.
+    Returns the `Date`, or None when nothing recurs on that day.
+    """
+    day = date.fromisoformat(date_id)
+    with transaction.atomic():
+        rules = [
+            rule
+            for rule in rules_between(property_id, day, day).select_for_update()
+            if next(occurrences(rule, day, day), None)
+        ]
+        if not rules:
+            return None
+        booked, _ = Date.objects.get_or_create(property_id=property_id, date=date_id)
+        booked.users.add(*{rule.user_id for rule in rules})
+        for rule in rules:
+            rule.exdates.append(date_id)
+            rule.save(update_fields=["exdates"])
+    return booked
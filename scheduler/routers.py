@@ -0,0 +1,74 @@
+import contextvars
+import random
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_read_from_replica = contextvars.ContextVar("read_from_replica", default=False)
+
+PIN_KEY = "replica-pin:%s"
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a random replica while a view decorated with
+    `replica_reads` is running. Everything else, including every write,
+    stays on the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+def pin_to_primary(user):
+    """Send a user's reads to the primary until replication catches up."""
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        cache.set(PIN_KEY % user.pk, True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and cache.get(PIN_KEY % user.pk, False)
+
+
+def reading_from_replica():
+    """Whether queries made right now are routed to a replica."""
+    return _read_from_replica.get() and bool(settings.DATABASE_REPLICAS)
+
+
+def replica_reads(view):
+    """
+    Serve safe requests from a replica, unless the user wrote recently.
+
+    Successful writes pin the user to the primary for
+    REPLICA_PIN_SECONDS so they always read their own changes. The pin lives
+    in the default cache, so multi-process deployments need a shared cache.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            if not settings.DATABASE_REPLICAS or is_pinned_to_primary(request.user):
+                return view(request, *args, **kwargs)
+            token = _read_from_replica.set(True)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_from_replica.reset(token)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code < 400:
+            pin_to_primary(request.user)
+        return response
+
+    return wrapper
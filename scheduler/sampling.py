@@ -0,0 +1,129 @@
+"""
+Evidence for slow requests: every request slower than SLOW_REQUEST_MS, and
+a SLOW_REQUEST_SAMPLE_RATE fraction of all requests, is logged to the
+"scheduler.sampling" logger as one JSON record holding its SQL with
+timings and the time spent in each serializer. Sampled requests are also
+profiled, which is too costly to do for every request on the chance that
+it turns out slow. `manage.py slow_requests` aggregates the records.
+"""
+
+import cProfile
+import contextvars
+import logging
+import pstats
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MESSAGE = "Slow request"
+
+_sample = contextvars.ContextVar("sample", default=None)
+
+
+class Sample:
+    def __init__(self):
+        self.queries = []
+        self.query_count = 0
+        self.query_ms = 0.0
+        # {serializer class name: [calls, ms]}, nested serializers included.
+        self.serializers = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.query_count += 1
+            self.query_ms += ms
+            if len(self.queries) < settings.SLOW_REQUEST_MAX_QUERIES:
+                alias = context["connection"].alias
+                self.queries.append({"sql": sql, "ms": round(ms, 3), "db": alias})
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent inside to serializer `name`, while sampling."""
+    sample = _sample.get()
+    if sample is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        totals = sample.serializers.setdefault(name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += (time.perf_counter() - start) * 1000
+
+
+def profile_summary(profile, limit):
+    """The `limit` functions with the most cumulative time."""
+    stats = pstats.Stats(profile).stats
+    top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": "%s:%d(%s)" % (filename, line, name),
+            "calls": calls,
+            "ms": round(tottime * 1000, 3),
+            "cumulative_ms": round(cumtime * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in top
+    ]
+
+
+class SlowRequestMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_REQUEST_MS
+        rate = settings.SLOW_REQUEST_SAMPLE_RATE
+        if not threshold and not rate:
+            return self.get_response(request)
+
+        sampled = random.random() < rate
+        sample = Sample()
+        token = _sample.set(sample)
+        profile = cProfile.Profile() if sampled else None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample.record_query))
+                if profile is None:
+                    response = self.get_response(request)
+                else:
+                    response = profile.runcall(self.get_response, request)
+        finally:
+            _sample.reset(token)
+        ms = (time.perf_counter() - start) * 1000
+
+        if sampled or (threshold and ms >= threshold):
+            match = request.resolver_match
+            extra = {
+                "method": request.method,
+                "path": request.path,
+                "route": match.route if match else request.path,
+                "status": response.status_code,
+                "ms": round(ms, 3),
+                "sampled": sampled,
+                "query_count": sample.query_count,
+                "query_ms": round(sample.query_ms, 3),
+                "queries": sample.queries,
+                "serializers": {
+                    name: {"calls": calls, "ms": round(total, 3)}
+                    for name, (calls, total) in sample.serializers.items()
+                },
+            }
+            if profile is not None:
+                extra["profile"] = profile_summary(
+                    profile, settings.SLOW_REQUEST_PROFILE_LINES
+                )
+            logger.info(MESSAGE, extra=extra)
+        return response
@@ -1,13 +1,57 @@
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.authentication import authenticate
-from scheduler.models import Date, Note
+from scheduler import sampling
+from scheduler.dates import FIRST_DAY, LAST_DAY, is_day
+from scheduler.models import Date, Note, Property, RecurringBooking
+from scheduler.properties import property_id
+from scheduler.utils import MAX_ID, parse_id
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Serializes only what a scheduler.sparse.Sparse asks for. Relations named
+    in `collapsed` are serialized as ids unless expanded. Without a Sparse
+    every field is serialized, relations nested. Time spent serializing is
+    reported to scheduler.sampling.
+    """
+
+    # {field name: callable returning the field serializing it as ids}
+    collapsed = {}
+
+    def __init__(self, *args, sparse=None, **kwargs):
+        self.sparse = sparse
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse is None:
+            return fields
+        for name in list(fields):
+            if not self.sparse.wants(name):
+                del fields[name]
+                continue
+            child = self.sparse.expand.get(name)
+            if child is None and name in self.collapsed:
+                fields[name] = self.collapsed[name]()
+            elif child is not None:
+                nested = getattr(fields[name], "child", fields[name])
+                if isinstance(nested, SparseFieldsMixin):
+                    nested.sparse = child
+        return fields
+
+    def to_representation(self, instance):
+        with sampling.timed(type(self).__name__):
+            return super().to_representation(instance)
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     username = serializers.CharField(max_length=150)
     email = serializers.EmailField()
 
@@ -15,6 +59,17 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ["id", "username", "email"]
 
+    @classmethod
+    def columns(cls, sparse):
+        return ["id", *(name for name in ("username", "email") if sparse.wants(name))]
+
+    @classmethod
+    def prepare(cls, queryset, sparse):
+        """Load what UserSerializer(sparse=sparse) reads."""
+        if sparse is None:
+            return queryset
+        return queryset.only(*cls.columns(sparse))
+
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     username = serializers.CharField(max_length=150)
@@ -49,55 +104,282 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
         fields = ["url", "name"]
 
 
-class NoteSerializer(serializers.ModelSerializer):
+class PropertySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Property
+        fields = ["slug", "name"]
+
+
+class PropertyDateField(serializers.SlugRelatedField):
+    """
+    A Date by its YYYY-MM-DD, looked up in context["property_id"] or the
+    default property.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field="date", **kwargs)
+
+    def get_queryset(self):
+        return Date.objects.filter(
+            property_id=self.context.get("property_id") or property_id()
+        )
+
+    def to_internal_value(self, data):
+        # No query for what can't be a day.
+        if not is_day(data):
+            self.fail("does_not_exist", slug_name=self.slug_field, value=str(data))
+        return super().to_internal_value(data)
+
+
+class UserIdsField(serializers.ManyRelatedField):
+    """
+    Users by pk, at most `max_length` of them, looked up in one query rather
+    than one per pk.
+    """
+
+    default_error_messages = {
+        "max_length": "Ensure this field has no more than {max_length} elements."
+    }
+
+    def __init__(self, max_length, **kwargs):
+        self.max_length = max_length
+        child = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+        super().__init__(child_relation=child, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__len__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if len(data) > self.max_length:
+            self.fail("max_length", max_length=self.max_length)
+        pks = []
+        for value in data:
+            pk = parse_id(value) if isinstance(value, str) else value
+            if type(pk) is not int:
+                self.child_relation.fail(
+                    "incorrect_type", data_type=type(value).__name__
+                )
+            if not 0 < pk <= MAX_ID:
+                # No such user, and too large for some databases to compare.
+                self.child_relation.fail("does_not_exist", pk_value=pk)
+            pks.append(pk)
+        users = User.objects.in_bulk(pks)
+        for pk in pks:
+            if pk not in users:
+                self.child_relation.fail("does_not_exist", pk_value=pk)
+        return [users[pk] for pk in pks]
+
+
+class NoteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
         write_only=True, source="user", queryset=User.objects.all()
     )
-    date = serializers.PrimaryKeyRelatedField(queryset=Date.objects.all())
+    date = PropertyDateField()
+
+    collapsed = {"user": lambda: serializers.ReadOnlyField(source="user_id")}
 
     class Meta:
         model = Note
         fields = ["id", "date", "user", "user_id", "message"]
 
+    @classmethod
+    def prepare(cls, queryset, sparse, with_date=True):
+        """
+        Load what NoteSerializer(sparse=sparse) reads. Pass with_date=False
+        when the notes are prefetched from their Date, which sets it.
+        """
+        if sparse is None:
+            related = ["user", "date"] if with_date else ["user"]
+            return queryset.select_related(*related)
+        columns = ["id", "date"]
+        if with_date and sparse.wants("date"):
+            queryset = queryset.select_related("date")
+            columns.append("date__date")
+        if sparse.wants("message"):
+            columns.append("message")
+        if sparse.wants("user"):
+            columns.append("user")
+            child = sparse.expand.get("user")
+            if child is not None:
+                queryset = queryset.select_related("user")
+                columns += ["user__" + name for name in UserSerializer.columns(child)]
+        return queryset.only(*columns)
+
+    # The note and its Date's note_count change together.
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, validated_data)
 
-class DateSerializer(serializers.ModelSerializer):
+
+class DateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     users = UserSerializer(many=True, read_only=True)
-    user_ids = serializers.PrimaryKeyRelatedField(
-        write_only=True, many=True, source="users", queryset=User.objects.all()
-    )
-    notes = NoteSerializer(many=True)
+    user_ids = UserIdsField(settings.DATE_MAX_USERS, write_only=True, source="users")
+    notes = NoteSerializer(many=True, max_length=settings.DATE_MAX_NOTES)
+
+    # Booked user ids come from the denormalized user_ids, without a join.
+    collapsed = {
+        "users": lambda: serializers.ReadOnlyField(source="user_ids"),
+        "notes": lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True),
+    }
 
     class Meta:
         model = Date
         fields = ["date", "users", "notes", "user_ids"]
         lookup_field = "date"
 
+    @classmethod
+    def prepare(cls, queryset, sparse):
+        """
+        Load what DateSerializer(sparse=sparse) reads: users and notes are
+        prefetched only when asked for. user_ids is always loaded, for
+        merging in recurring bookings.
+        """
+        if sparse is None:
+            notes = NoteSerializer.prepare(Note.objects.all(), None, with_date=False)
+            return queryset.prefetch_related("users", Prefetch("notes", notes))
+        queryset = queryset.only("id", "date", "user_ids")
+        users = sparse.expand.get("users")
+        if sparse.wants("users") and users is not None:
+            users = UserSerializer.prepare(User.objects.all(), users)
+            queryset = queryset.prefetch_related(Prefetch("users", users))
+        if sparse.wants("notes"):
+            notes = sparse.expand.get("notes")
+            if notes is None:
+                notes = Note.objects.only("id", "date")
+            else:
+                notes = NoteSerializer.prepare(
+                    Note.objects.all(), notes, with_date=False
+                )
+            queryset = queryset.prefetch_related(Prefetch("notes", notes))
+        return queryset
+
+    def validate_date(self, value):
+        # Unique per property, which the serializer has no field for.
+        dates = Date.objects.filter(
+            property_id=self.context.get("property_id") or property_id(), date=value
+        )
+        if self.instance is not None:
+            dates = dates.exclude(pk=self.instance.pk)
+        if dates.exists():
+            raise serializers.ValidationError("date with this date already exists.")
+        return value
+
     def create(self, validated_data):
         notes_data = validated_data.pop("notes", [])
         users_data = validated_data.pop("users", [])
 
-        date = Date.objects.create(**validated_data)
-        date.users.set(users_data)
+        with transaction.atomic():
+            date = Date.objects.create(**validated_data)
+            date.users.set(users_data)
 
-        for note_data in notes_data:
-            Note.objects.create(date=date, **note_data)
+            for note_data in notes_data:
+                Note.objects.create(date=date, **note_data)
         return date
 
     def update(self, instance, validated_data):
         # Note data not dealt with
         users_data = validated_data.pop("users", [])
 
+        # Updates the user_ids summary (and the instance) as well.
         instance.users.set(users_data)
-        instance.save()
 
         return instance
 
 
-class DateMonthSerializer(serializers.ModelSerializer):
-    users = UserSerializer(many=True, read_only=True)
+def booked_users(user_ids, sparse):
+    """
+    {pk: User} for `user_ids`, fetched only when DateSerializer(sparse=sparse)
+    nests users. Otherwise only their pks are serialized, so bare Users do.
+    """
+    if sparse is None or "users" in sparse.expand:
+        return User.objects.in_bulk(user_ids)
+    return {pk: User(pk=pk) for pk in user_ids}
+
+
+def date_users(users, sparse):
+    """Serialize `users` the way DateSerializer(sparse=sparse) does its users."""
+    if sparse is None:
+        return UserSerializer(users, many=True).data
+    child = sparse.expand.get("users")
+    if child is None:
+        return [user.pk for user in users]
+    return UserSerializer(users, many=True, sparse=child).data
+
+
+class DateMonthSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializes days from their denormalized user_ids and note_count. Pass
+    the booked users as a {pk: User} map in context["users"], see
+    `month_users`, so a month costs one query per table and no joins.
+    Users not expanded need no map.
+    """
+
+    users = serializers.SerializerMethodField()
+
+    collapsed = {"users": lambda: serializers.ReadOnlyField(source="user_ids")}
 
     class Meta:
         model = Date
-        fields = ["date", "users"]
+        fields = ["date", "users", "note_count"]
         lookup_field = "date"
+
+    def get_users(self, date):
+        users = self.context["users"]
+        child = self.sparse.expand.get("users") if self.sparse else None
+        return UserSerializer(
+            [users[pk] for pk in date.user_ids if pk in users], many=True, sparse=child
+        ).data
+
+
+def month_users(dates):
+    """Fetch every user booked on the given dates, keyed by pk."""
+    user_ids = {pk for date in dates for pk in date.user_ids}
+    if not user_ids:
+        return {}
+    return User.objects.in_bulk(user_ids)
+
+
+class RecurringBookingSerializer(serializers.ModelSerializer):
+    user_id = serializers.PrimaryKeyRelatedField(
+        source="user", queryset=User.objects.all()
+    )
+    byweekday = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        required=False,
+        max_length=7,
+    )
+
+    class Meta:
+        model = RecurringBooking
+        fields = [
+            "id",
+            "user_id",
+            "freq",
+            "interval",
+            "byweekday",
+            "dtstart",
+            "until",
+            "count",
+            "exdates",
+        ]
+        read_only_fields = ["exdates"]
+        extra_kwargs = {
+            "interval": {"min_value": 1, "max_value": RecurringBooking.MAX_INTERVAL},
+            "count": {"min_value": 1, "max_value": RecurringBooking.MAX_COUNT},
+        }
+
+    def validate(self, data):
+        if data.get("until") and data.get("count"):
+            raise serializers.ValidationError("Give either until or count, not both")
+        if data.get("until") and data["until"] < data["dtstart"]:
+            raise serializers.ValidationError("until is before dtstart")
+        for name in ("dtstart", "until"):
+            if data.get(name) and not FIRST_DAY <= data[name] <= LAST_DAY:
+                raise serializers.ValidationError(
+                    "%s must be from %s to %s" % (name, FIRST_DAY, LAST_DAY)
+                )
+        return data
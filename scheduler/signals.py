@@ -0,0 +1,35 @@
+from django.dispatch import Signal
+
+# Hooks for metrics and in-process caches. Receivers must be cheap, they
+# run on the request path.
+
+# Sent when a request reused the result of an identical in-flight request.
+# Arguments: key
+request_coalesced = Signal()
+
+# Sent when a request is rejected by a rate limit.
+# Arguments: request, scope
+request_throttled = Signal()
+
+# Sent by the task worker after each attempt at a task.
+# Arguments: name, status, duration (seconds running), latency (seconds
+# from being queued to finishing)
+task_finished = Signal()
+
+# Sent by the task worker each time it polls the queue.
+# Arguments: depth (tasks waiting to run)
+task_queue_polled = Signal()
+
+# Sent after this process moved a property to a new cache namespace, see
+# scheduler.properties.
+# Arguments: property_id, version (the new one)
+namespace_changed = Signal()
+
+# Sent by the login view after each attempt.
+# Arguments: outcome ("token" for a token reused, "password" or "failed")
+login_attempted = Signal()
+
+# Sent on lookups in the month cache, the property cache and the calendar
+# index.
+# Arguments: cache (its name), hit
+cache_accessed = Signal()
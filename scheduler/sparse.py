@@ -0,0 +1,83 @@
+"""
+Sparse fieldsets for read endpoints: ?fields= picks the fields returned and
+?expand= which relations are nested objects rather than ids.
+
+    ?fields=date,users              {"date": ..., "users": [1, 2]}
+    ?fields=date,users.username     {"date": ..., "users": [{"username": ...}]}
+    ?expand=notes.user              every field, notes nested with their user
+
+Without either parameter nothing changes and every relation is nested.
+Serializers apply a Sparse through SparseFieldsMixin, and their `prepare`
+classmethods trim the queryset to match.
+"""
+
+
+class Sparse:
+    def __init__(self):
+        # Field names to return, or None for all of them.
+        self.fields = None
+        # Relations to nest, each with the Sparse for its own fields.
+        self.expand = {}
+
+    def wants(self, name):
+        return self.fields is None or name in self.fields
+
+    def key(self):
+        """A canonical string, for cache and coalescing keys."""
+        fields = "*" if self.fields is None else ",".join(sorted(self.fields))
+        nested = "".join(
+            "%s(%s)" % (name, self.expand[name].key()) for name in sorted(self.expand)
+        )
+        return fields + ";" + nested
+
+
+def split(value):
+    return [path for path in value.split(",") if path]
+
+
+def parse(fields="", expand=""):
+    """The Sparse for ?fields= and ?expand= values, or None for neither."""
+    if not fields and not expand:
+        return None
+    root = Sparse()
+    for path in split(fields):
+        node = root
+        *relations, name = path.split(".")
+        for relation in relations:
+            node.fields = (node.fields or set()) | {relation}
+            node = node.expand.setdefault(relation, Sparse())
+        node.fields = (node.fields or set()) | {name}
+    for path in split(expand):
+        node = root
+        for relation in path.split("."):
+            node = node.expand.setdefault(relation, Sparse())
+    return root
+
+
+def from_request(request):
+    params = request.query_params
+    return parse(params.get("fields", ""), params.get("expand", ""))
+
+
+def prune(data, sparse):
+    """
+    Apply a Sparse to data serialized in full, such as archived dates:
+    drop unwanted fields and collapse relations that aren't expanded to
+    their ids.
+    """
+    if sparse is None:
+        return data
+    pruned = {}
+    for name, value in data.items():
+        if not sparse.wants(name):
+            continue
+        child = sparse.expand.get(name)
+        if isinstance(value, dict):
+            value = value["id"] if child is None else prune(value, child)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            if child is None:
+                value = [item["id"] for item in value]
+            else:
+                value = [prune(item, child) for item in value]
+        pruned[name] = value
+    return pruned
@@ -0,0 +1,126 @@
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from scheduler.models import Date, Note
+
+
+def booked_user_ids(date_ids, for_update=False):
+    """
+    Map each date id to its sorted booked user ids, in one query. Use
+    `for_update` inside a transaction to read the latest committed rows
+    rather than its snapshot.
+    """
+    user_ids = {date_id: [] for date_id in date_ids}
+    rows = (
+        Date.users.through.objects.filter(date_id__in=date_ids)
+        .order_by("date_id", "user_id")
+        .values_list("date_id", "user_id")
+    )
+    if for_update:
+        rows = rows.select_for_update()
+    for date_id, user_id in rows:
+        user_ids[date_id].append(user_id)
+    return user_ids
+
+
+def lock_dates(date_ids):
+    # Sent before the bookings change, so concurrent changes to the same
+    # dates queue here instead of summarizing each other's snapshot.
+    list(
+        Date.objects.select_for_update()
+        .filter(pk__in=date_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def refresh_user_ids(date_ids):
+    now = timezone.now()
+    for date_id, user_ids in booked_user_ids(date_ids, for_update=True).items():
+        Date.objects.filter(pk=date_id).update(user_ids=user_ids, modified=now)
+
+
+def adjust_note_count(date_id, delta):
+    Date.objects.filter(pk=date_id).update(
+        note_count=F("note_count") + delta, modified=timezone.now()
+    )
+
+
+def users_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # The cleared dates are unknown afterwards, remember them now.
+        instance._cleared_date_ids = list(
+            instance.date_set.values_list("pk", flat=True)
+        )
+        lock_dates(instance._cleared_date_ids)
+        return
+    if action in ("pre_add", "pre_remove", "pre_clear"):
+        lock_dates(pk_set if reverse else [instance.pk])
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        # Keep the in-memory instance in step too, so a later save() does
+        # not write stale values back.
+        booked = booked_user_ids([instance.pk], for_update=True)
+        instance.user_ids = booked[instance.pk]
+        instance.modified = timezone.now()
+        Date.objects.filter(pk=instance.pk).update(
+            user_ids=instance.user_ids, modified=instance.modified
+        )
+    elif action == "post_clear":
+        refresh_user_ids(instance.__dict__.pop("_cleared_date_ids", []))
+    else:
+        refresh_user_ids(list(pk_set))
+
+
+def note_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_date_id = getattr(instance, "_loaded_date_id", None)
+    if created:
+        adjust_note_count(instance.date_id, 1)
+    elif loaded_date_id is not None and loaded_date_id != instance.date_id:
+        adjust_note_count(loaded_date_id, -1)
+        adjust_note_count(instance.date_id, 1)
+    instance._loaded_date_id = instance.date_id
+
+
+def note_deleted(sender, instance, **kwargs):
+    adjust_note_count(instance.date_id, -1)
+
+
+def connect():
+    m2m_changed.connect(users_changed, sender=Date.users.through)
+    post_save.connect(note_saved, sender=Note)
+    post_delete.connect(note_deleted, sender=Note)
+
+
+def check_summaries(batch_size=1000, fix=False):
+    """
+    Compare the denormalized columns with the real bookings and notes.
+    Returns the ids of dates that disagreed, fixing them if asked.
+    """
+    mismatched = []
+    last = 0
+    while True:
+        batch = list(
+            Date.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .annotate(actual_note_count=Count("notes"))
+            .only("date", "user_ids", "note_count")[:batch_size]
+        )
+        if not batch:
+            return mismatched
+        actual_user_ids = booked_user_ids([date.pk for date in batch])
+        for date in batch:
+            user_ids = actual_user_ids[date.pk]
+            if date.user_ids != user_ids or date.note_count != date.actual_note_count:
+                mismatched.append(date.pk)
+                if fix:
+                    Date.objects.filter(pk=date.pk).update(
+                        user_ids=user_ids, note_count=date.actual_note_count
+                    )
+        last = batch[-1].pk
@@ -0,0 +1,146 @@
+"""
+A small database-backed task queue for side effects that should not slow
+down requests. No broker needed: tasks are rows in scheduler_task and
+`manage.py run_tasks` works through them with a thread pool.
+
+    @task(max_attempts=5)
+    def send_digest(user_id):
+        ...
+
+    send_digest.delay(user.pk)  # queued when the transaction commits
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from scheduler.models import Task
+from scheduler.signals import task_finished
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskSpec:
+    def __init__(self, name, func, max_attempts, retry_delay):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+
+def task(name=None, max_attempts=3, retry_delay=30):
+    """
+    Register a function as a task and give it a `delay(*args, **kwargs)`
+    method that queues it. Arguments must be JSON serializable. Failed
+    attempts are retried with exponential backoff starting at
+    `retry_delay` seconds.
+    """
+
+    def decorator(func):
+        task_name = name or "%s.%s" % (func.__module__, func.__name__)
+        registry[task_name] = TaskSpec(task_name, func, max_attempts, retry_delay)
+        func.delay = lambda *args, **kwargs: enqueue(task_name, *args, **kwargs)
+        return func
+
+    return decorator
+
+
+def enqueue(name, *args, **kwargs):
+    """
+    Queue a task once the current transaction commits, so it never sees
+    uncommitted data and never runs for a rolled back request. With
+    TASKS_EAGER it runs in-process on commit instead.
+    """
+    if name not in registry:
+        raise KeyError("Unknown task %r" % name)
+
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: registry[name].func(*args, **kwargs))
+    else:
+        transaction.on_commit(
+            lambda: Task.objects.create(name=name, args=list(args), kwargs=kwargs)
+        )
+
+
+def queue_depth():
+    return Task.objects.filter(status=Task.PENDING, run_at__lte=timezone.now()).count()
+
+
+def requeue_stale(timeout):
+    """Put tasks back whose worker died while running them."""
+    return Task.objects.filter(
+        status=Task.RUNNING, started__lt=timezone.now() - timeout
+    ).update(status=Task.PENDING)
+
+
+def claim(limit):
+    """
+    Mark up to `limit` due tasks as running and return them. The claim is a
+    conditional UPDATE, so concurrent workers never run the same task.
+    """
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+        .order_by("run_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+    claimed = []
+    for pk in list(candidates):
+        updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, started=now, attempts=F("attempts") + 1
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by("run_at"))
+
+
+def run(task_row):
+    """Run one claimed task, then record the outcome or schedule a retry."""
+    spec = registry.get(task_row.name)
+    started = timezone.now()
+    try:
+        if spec is None:
+            raise KeyError("Unknown task %r" % task_row.name)
+        spec.func(*task_row.args, **task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(
+            "Task failed",
+            extra={
+                "task": task_row.name,
+                "id": task_row.pk,
+                "attempt": task_row.attempts,
+            },
+        )
+        if spec is not None and task_row.attempts < spec.max_attempts:
+            backoff = spec.retry_delay * 2 ** (task_row.attempts - 1)
+            status = Task.PENDING
+            changes = {"run_at": timezone.now() + timedelta(seconds=backoff)}
+        else:
+            status = Task.FAILED
+            changes = {"finished": timezone.now()}
+        Task.objects.filter(pk=task_row.pk).update(
+            status=status, last_error=error, **changes
+        )
+    else:
+        status = Task.DONE
+        Task.objects.filter(pk=task_row.pk).update(
+            status=status, finished=timezone.now(), last_error=""
+        )
+
+    finished = timezone.now()
+    task_finished.send(
+        sender=Task,
+        name=task_row.name,
+        status=status,
+        duration=(finished - started).total_seconds(),
+        latency=(finished - task_row.created).total_seconds(),
+    )
+    return status
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from scheduler.models import Date, Note
+from scheduler.properties import property_id
+
+
+class NoteAdminTestCase(TestCase):
+    url = "/admin/scheduler/note/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@email.com", "pw")
+        cls.user = User.objects.create(username="Matt")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_notes(self, days):
+        for day in days:
+            date = Date.objects.create(
+                property_id=property_id(), date="2022-02-%02d" % day
+            )
+            Note.objects.create(date=date, user=self.user, message="note %d" % day)
+
+    def count_changelist_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.create_notes([1])
+        one_row = self.count_changelist_queries(self.url)
+        self.create_notes(range(2, 20))
+        self.assertEqual(self.count_changelist_queries(self.url), one_row)
+
+    def test_str_shows_the_day(self):
+        self.create_notes([1])
+        self.assertEqual(str(Note.objects.get()), '2022-02-01 -> "note 1"')
+
+    def test_filter_by_year_and_month(self):
+        self.create_notes([1, 2])
+        Note.objects.create(
+            date=Date.objects.create(property_id=property_id(), date="2023-03-01"),
+            user=self.user,
+            message="x",
+        )
+        response = self.client.get(self.url + "?year=2022&month=02")
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+        response = self.client.get(self.url + "?year=2023")
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+
+
+class DateAdminTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@email.com", "pw")
+        for date in ["2021-12-31", "2022-01-01", "2022-02-25"]:
+            Date.objects.create(property_id=property_id(), date=date)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_prefix_search(self):
+        response = self.client.get("/admin/scheduler/date/?q=2022-0")
+        self.assertEqual(
+            [date.date for date in response.context["cl"].result_list],
+            ["2022-02-25", "2022-01-01"],
+        )
+
+    def test_year_filter(self):
+        response = self.client.get("/admin/scheduler/date/?year=2021")
+        self.assertEqual(len(response.context["cl"].result_list), 1)
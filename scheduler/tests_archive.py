@@ -0,0 +1,91 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import ArchivedDate, Date, Note
+from scheduler.properties import property_id
+from scheduler.views import getDateById, getMonthById
+
+
+class ArchiveCalendarTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=1, username="Matt", email="email@email.com")
+        for date_id in ["2021-07-01", "2021-07-02", "2021-08-01", "2022-07-01"]:
+            date = Date.objects.create(property_id=property_id(), date=date_id)
+            date.users.set([cls.user])
+            Note.objects.create(date=date, user=cls.user, message="Note " + date_id)
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self):
+        out = StringIO()
+        call_command(
+            "archive_calendar", "--before", "2022", "--batch-size", "2", stdout=out
+        )
+        return out.getvalue()
+
+    def get(self, view, path, *args):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=self.user)
+        return view(request, *args)
+
+    def test_moves_old_dates_and_notes(self):
+        self.assertIn("Archived 3 dates before 2022", self.archive())
+        self.assertEqual(
+            list(Date.objects.values_list("date", flat=True)), ["2022-07-01"]
+        )
+        self.assertEqual(Note.objects.count(), 1)
+        self.assertEqual(ArchivedDate.objects.count(), 3)
+
+    def test_archiving_a_day_again(self):
+        self.archive()
+        date = Date.objects.create(property_id=property_id(), date="2021-07-01")
+        date.users.set([self.user])
+        self.assertIn("Archived 1 dates before 2022", self.archive())
+        self.assertEqual(ArchivedDate.objects.count(), 3)
+        archived = ArchivedDate.objects.get(date="2021-07-01")
+        self.assertEqual(archived.data["notes"], [])
+        self.assertFalse(Date.objects.filter(date="2021-07-01").exists())
+
+    def test_get_date_falls_back_to_archive(self):
+        self.archive()
+        response = self.get(getDateById, "date/2021-07-01", "2021-07-01")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data["users"][0]["username"], "Matt")
+        self.assertEqual(response.data["notes"][0]["message"], "Note 2021-07-01")
+
+    def test_archived_date_is_read_only(self):
+        self.archive()
+        request = APIRequestFactory().delete("date/2021-07-01")
+        force_authenticate(request, user=self.user)
+        response = getDateById(request, "2021-07-01")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_month_falls_back_to_archive(self):
+        self.archive()
+        Date.objects.create(property_id=property_id(), date="2021-07-03")
+        response = self.get(getMonthById, "/month/2021/07", "2021", "07")
+        self.assertEqual(
+            [day["date"] for day in response.data],
+            ["2021-07-01", "2021-07-02", "2021-07-03"],
+        )
+        self.assertEqual(
+            response.data[0]["users"],
+            [{"id": 1, "username": "Matt", "email": "email@email.com"}],
+        )
+
+    def test_live_month_skips_archive(self):
+        self.archive()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(getMonthById, "/month/2022/07", "2022", "07")
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse([query for query in queries if "archiveddate" in query["sql"]])
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from scheduler.views import CustomAuthToken, getNonAdminUsers
+
+FAST_SCRYPT = {
+    "PASSWORD_HASHERS": [
+        "scheduler.hashers.TunedScryptPasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    ],
+    "PASSWORD_SCRYPT_WORK_FACTOR": 2**8,
+    "PASSWORD_SCRYPT_BLOCK_SIZE": 8,
+    "PASSWORD_SCRYPT_PARALLELISM": 1,
+}
+
+
+def login(data, token=None):
+    headers = {"HTTP_AUTHORIZATION": "Token " + token} if token else {}
+    request = APIRequestFactory().post("/login", data, **headers)
+    return CustomAuthToken.as_view()(request)
+
+
+@override_settings(**FAST_SCRYPT)
+class PasswordRehashTestCase(TestCase):
+    password = "testPassword1"
+
+    def test_login_rehashes_old_hasher(self):
+        user = User.objects.create(
+            username="Matt",
+            # Few iterations keep the test fast; verify uses the stored count.
+            password=PBKDF2PasswordHasher().encode(self.password, "salt", 1000),
+        )
+        response = login({"username": "Matt", "password": self.password})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$256$"))
+
+    def test_login_rehashes_changed_parameters(self):
+        User.objects.create_user(username="Matt", password=self.password)
+        with self.settings(PASSWORD_SCRYPT_WORK_FACTOR=2**9):
+            login({"username": "Matt", "password": self.password})
+        self.assertTrue(
+            User.objects.get(username="Matt").password.startswith("scrypt$512$")
+        )
+
+
+class LoginTokenReuseTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Matt", password="testPassword1")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def test_valid_token_skips_password(self):
+        response = login({"username": "Matt"}, token=self.token.key)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data["token"], self.token.key)
+
+    def test_token_for_other_user_requires_password(self):
+        User.objects.create_user(username="Other", password="testPassword2")
+        response = login({"username": "Other"}, token=self.token.key)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_body_must_be_an_object(self):
+        request = APIRequestFactory().post(
+            "/login",
+            ["Matt"],
+            format="json",
+            HTTP_AUTHORIZATION="Token " + self.token.key,
+        )
+        response = CustomAuthToken.as_view()(request)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_invalid_token_is_ignored(self):
+        response = login(
+            {"username": "Matt", "password": "testPassword1"}, token="not-a-token"
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data["token"], self.token.key)
+
+
+@override_settings(TOKEN_TTL=timedelta(days=1))
+class TokenExpiryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Matt", password="testPassword1")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def expire(self, token):
+        Token.objects.filter(pk=token.pk).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+
+    def get_users(self, token):
+        request = APIRequestFactory().get(
+            "/users/all", HTTP_AUTHORIZATION="Token " + token.key
+        )
+        return getNonAdminUsers(request)
+
+    def test_fresh_token_accepted(self):
+        self.assertEqual(self.get_users(self.token).status_code, HTTPStatus.OK)
+
+    def test_expired_token_rejected(self):
+        self.expire(self.token)
+        response = self.get_users(self.token)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_expired_token_check_costs_no_extra_query(self):
+        self.expire(self.token)
+        with self.assertNumQueries(1):
+            self.get_users(self.token)
+
+    def test_login_replaces_expired_token(self):
+        self.expire(self.token)
+        response = login(
+            {"username": "Matt", "password": "testPassword1"}, token=self.token.key
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response.data["token"], self.token.key)
+        self.assertFalse(Token.objects.filter(pk=self.token.pk).exists())
+
+
+@override_settings(TOKEN_TTL=timedelta(days=1))
+class SweepTokensTestCase(TestCase):
+    def test_sweep_deletes_only_expired_tokens(self):
+        for index in range(5):
+            user = User.objects.create(username="user%d" % index)
+            Token.objects.create(user=user)
+        fresh = Token.objects.create(user=User.objects.create(username="fresh"))
+        Token.objects.exclude(pk=fresh.pk).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+
+        out = StringIO()
+        call_command("sweep_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(list(Token.objects.all()), [fresh])
+        self.assertIn("Deleted 5 expired tokens", out.getvalue())
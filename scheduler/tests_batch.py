@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date, Note, RecurringBooking
+from scheduler.properties import property_id
+from scheduler.views import getBatch, getDateById, getNote
+
+
+class BatchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt")
+        cls.anna = User.objects.create(id=2, username="Anna")
+        for day in ("2022-07-01", "2022-07-02", "2022-07-03"):
+            booked = Date.objects.create(property_id=property_id(), date=day)
+            booked.users.add(cls.matt)
+            Note.objects.create(date=booked, user=cls.matt, message=day)
+        RecurringBooking.objects.create(
+            property_id=property_id(),
+            user=cls.anna,
+            freq=RecurringBooking.DAILY,
+            dtstart=date(2022, 7, 3),
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Resolving the property is cached, keep it out of the counts.
+        property_id()
+
+    def get(self, view, path, *args, **params):
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=self.matt)
+        return view(request, *args)
+
+    def test_matches_single_endpoints(self):
+        days = ["2022-07-01", "2022-07-03", "2022-07-04"]
+        notes = Note.objects.order_by("pk").values_list("pk", flat=True)
+        response = self.get(
+            getBatch,
+            "/batch",
+            dates=",".join(days),
+            notes=",".join(str(pk) for pk in notes),
+        )
+        for day in days:
+            single = self.get(getDateById, "/date/" + day, day)
+            self.assertEqual(response.data["dates"][day]["data"], single.data)
+        for pk in notes:
+            single = self.get(getNote, "/note/%d" % pk, pk)
+            self.assertEqual(response.data["notes"][str(pk)]["data"], single.data)
+
+    def test_per_item_errors(self):
+        response = self.get(
+            getBatch,
+            "/batch",
+            dates="2021-01-01,2022-02-30",
+            notes="999,x,\u00b2,%d" % 2**63,
+        )
+        self.assertEqual(
+            response.data,
+            {
+                "dates": {"2021-01-01": {"status": 404}, "2022-02-30": {"status": 400}},
+                "notes": {
+                    "999": {"status": 404},
+                    "x": {"status": 400},
+                    "\u00b2": {"status": 400},
+                    str(2**63): {"status": 400},
+                },
+            },
+        )
+
+    def test_notes_are_keyed_as_requested(self):
+        pk = Note.objects.order_by("pk").values_list("pk", flat=True)[0]
+        response = self.get(getBatch, "/batch", notes="%d,00%d" % (pk, pk))
+        notes = response.data["notes"]
+        self.assertEqual(sorted(notes), sorted([str(pk), "00%d" % pk]))
+        self.assertEqual(notes[str(pk)], notes["00%d" % pk])
+
+    def test_query_count_does_not_grow(self):
+        # Dates, their users, notes with their users, the rules, recurring
+        # users, then the notes asked for.
+        with self.assertNumQueries(6):
+            self.get(
+                getBatch,
+                "/batch",
+                dates="2022-07-01,2022-07-02,2022-07-03",
+                notes="1,2,3",
+            )
+
+    @override_settings(BATCH_MAX_ITEMS=2)
+    def test_limit(self):
+        response = self.get(
+            getBatch, "/batch", dates="2022-07-01,2022-07-02", notes="1"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,174 @@
+import base64
+import threading
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler import calendar_index
+from scheduler.models import Date, RecurringBooking
+from scheduler.properties import VERSION_KEY, property_id
+from scheduler.views import getAvailability, getFreeSlots
+
+
+class EncodingTests(SimpleTestCase):
+    def test_bitmap(self):
+        numbers = calendar_index.day_numbers(2022, ["2022-01-01", "2022-01-10"])
+        self.assertEqual(numbers, [0, 9])
+        packed = base64.b64decode(calendar_index.bitmap(numbers, 365))
+        self.assertEqual(len(packed), 46)
+        self.assertEqual(packed[:2], bytes([0b00000001, 0b00000010]))
+
+    def test_runs(self):
+        self.assertEqual(
+            calendar_index.runs([0, 1, 2, 9, 11, 12]), [[0, 3], [9, 1], [11, 2]]
+        )
+
+
+class LoadingTests(SimpleTestCase):
+    def test_cold_year_does_not_hold_up_other_reads(self):
+        index = calendar_index.CalendarIndex()
+        started, release = threading.Event(), threading.Event()
+
+        def load_year(property_id, year):
+            if property_id == 1:
+                started.set()
+                release.wait(5)
+            return calendar_index.Year({}, {})
+
+        with mock.patch.object(calendar_index, "load_year", load_year):
+            index.year(2, 2022)
+            loading = threading.Thread(target=index.year, args=(1, 2022))
+            loading.start()
+            started.wait(5)
+            index.year(2, 2022)
+            index.year(2, 2023)
+            self.assertTrue(loading.is_alive())
+            release.set()
+            loading.join(5)
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt")
+        cls.anna = User.objects.create(id=2, username="Anna")
+        for day in ("2022-01-01", "2022-01-02"):
+            Date.objects.create(property_id=property_id(), date=day).users.add(cls.matt)
+        Date.objects.create(property_id=property_id(), date="2022-01-05")
+        # Every Monday of January.
+        RecurringBooking.objects.create(
+            property_id=property_id(),
+            user=cls.anna,
+            freq=RecurringBooking.WEEKLY,
+            dtstart=date(2022, 1, 3),
+            until=date(2022, 1, 31),
+        )
+
+    def setUp(self):
+        cache.clear()
+        calendar_index.index.clear()
+
+    def get(self, **params):
+        request = APIRequestFactory().get("/availability/2022", params)
+        force_authenticate(request, user=self.matt)
+        return getAvailability(request, "2022")
+
+    def test_rle_for_everyone_and_one_user(self):
+        response = self.get(encoding="rle")
+        self.assertEqual(response.data["days"], 365)
+        self.assertEqual(
+            response.data["data"], [[0, 3], [9, 1], [16, 1], [23, 1], [30, 1]]
+        )
+        self.assertEqual(self.get(encoding="rle", user=1).data["data"], [[0, 2]])
+
+    def test_bitmap(self):
+        packed = base64.b64decode(self.get().data["data"])
+        self.assertEqual(packed[0], 0b00000111)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(encoding="png").status_code, 400)
+        self.assertEqual(self.get(user="me").status_code, 400)
+        self.assertEqual(self.get(user="\u00b2").status_code, 400)
+        self.assertEqual(self.get(user=str(2**63)).status_code, 400)
+
+    def test_local_changes_apply_in_place(self):
+        self.get()
+        date = Date.objects.get(date="2022-01-05")
+        with self.captureOnCommitCallbacks(execute=True):
+            date.users.add(self.anna)
+        with self.assertNumQueries(0):
+            response = self.get(encoding="rle", user=2)
+        self.assertEqual(response.data["data"][:2], [[2, 1], [4, 1]])
+
+    def test_other_processes_changes_reload(self):
+        self.get()
+        Date.objects.create(property_id=property_id(), date="2022-01-07").users.add(
+            self.matt
+        )
+        # As if another process saved the change.
+        cache.incr(VERSION_KEY % property_id())
+        response = self.get(encoding="rle", user=1)
+        self.assertEqual(response.data["data"], [[0, 2], [6, 1]])
+
+    def test_years_expire(self):
+        self.get()
+        # As if another process saved it, with a cache of its own.
+        Date.objects.create(property_id=property_id(), date="2022-01-07").users.add(
+            self.matt
+        )
+        self.assertEqual(self.get(encoding="rle", user=1).data["data"], [[0, 2]])
+        with override_settings(CALENDAR_INDEX_MAX_AGE=0):
+            response = self.get(encoding="rle", user=1)
+        self.assertEqual(response.data["data"], [[0, 2], [6, 1]])
+
+
+class FreeSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt")
+        for day in ("2022-08-03", "2022-08-04", "2022-08-10", "2022-12-31"):
+            Date.objects.create(property_id=property_id(), date=day).users.add(cls.matt)
+        # Created but unbooked days are free.
+        Date.objects.create(property_id=property_id(), date="2022-08-20")
+
+    def setUp(self):
+        cache.clear()
+        calendar_index.index.clear()
+
+    def get(self, **params):
+        request = APIRequestFactory().get("/free-slots", params)
+        force_authenticate(request, user=self.matt)
+        return getFreeSlots(request)
+
+    def test_slots_between_bookings(self):
+        response = self.get(**{"length": 5, "from": "2022-08-01", "to": "2022-08-31"})
+        self.assertEqual(
+            response.data,
+            [
+                {"start": "2022-08-05", "end": "2022-08-09", "days": 5},
+                {"start": "2022-08-11", "end": "2022-08-31", "days": 21},
+            ],
+        )
+
+    def test_slots_span_years(self):
+        slots = calendar_index.free_slots(
+            property_id(), date(2022, 12, 30), date(2023, 1, 2), 2
+        )
+        self.assertEqual(slots, [(date(2023, 1, 1), date(2023, 1, 2))])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(length="x").status_code, 400)
+        self.assertEqual(self.get(length=0).status_code, 400)
+        self.assertEqual(self.get(**{"from": "2022-02-30"}).status_code, 400)
+        response = self.get(**{"from": "2022-01-01", "to": "2040-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_warm_loads_current_years(self):
+        calendar_index.warm(1)
+        pk = property_id()
+        with self.assertNumQueries(0):
+            calendar_index.index.year(pk, date.today().year)
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from scheduler.dates import is_day, parse_day
+from scheduler.models import Date
+from scheduler.properties import property_id
+from scheduler.serializers import DateSerializer, NoteSerializer
+
+
+class DayIdTests(SimpleTestCase):
+    def test_real_days(self):
+        for value in ("2020-01-01", "2024-02-29", "2023-04-30", "2099-12-31"):
+            self.assertTrue(is_day(value), value)
+
+    def test_not_days(self):
+        for value in (
+            "2023-02-29",
+            "2024-02-30",
+            "2023-04-31",
+            "2023-00-10",
+            "2023-13-01",
+            "2023-01-00",
+            "2019-12-31",
+            "2100-01-01",
+            "20230101",
+            "2023-W01-1",
+            "2023-01-01 ",
+            "２０２３-01-01",
+            "",
+            None,
+            20230101,
+        ):
+            self.assertFalse(is_day(value), value)
+
+    def test_parse_day(self):
+        self.assertEqual(parse_day("2024-02-29").isoformat(), "2024-02-29")
+        with self.assertRaises(ValueError):
+            parse_day("2023-02-29")
+
+
+class ValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(username="Matt")
+        Date.objects.create(property_id=property_id(), date="2022-07-01")
+
+    def setUp(self):
+        # Resolving the property is cached, keep it out of the counts.
+        property_id()
+
+    def test_model_rejects_impossible_days(self):
+        with self.assertRaises(ValidationError):
+            Date(property_id=property_id(), date="2023-02-31").full_clean()
+
+    def test_user_ids_in_one_query(self):
+        users = User.objects.bulk_create(
+            [User(username="user%d" % i) for i in range(20)]
+        )
+        serializer = DateSerializer(
+            data={"date": "2022-07-02", "user_ids": [u.pk for u in users], "notes": []}
+        )
+        # The date's uniqueness, then every user at once.
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer = DateSerializer(
+            data={"date": "2022-07-02", "user_ids": [self.matt.pk, 999], "notes": []}
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("999", str(serializer.errors["user_ids"]))
+
+    def test_bad_user_ids_need_no_query(self):
+        for user_ids in (["\u00b2"], [2**63], ["%d" % 2**63], [-1], [True]):
+            serializer = DateSerializer(
+                data={"date": "2022-07-02", "user_ids": user_ids, "notes": []}
+            )
+            # Only the date's uniqueness.
+            with self.assertNumQueries(1):
+                self.assertFalse(serializer.is_valid())
+            self.assertIn("user_ids", serializer.errors)
+
+    def test_list_limits(self):
+        serializer = DateSerializer(
+            data={"date": "2022-07-02", "user_ids": list(range(1, 102)), "notes": []}
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn("user_ids", serializer.errors)
+
+    def test_note_on_impossible_day_needs_no_date_query(self):
+        serializer = NoteSerializer(
+            data={"date": "2022-02-30", "user_id": self.matt.pk, "message": "Hi"}
+        )
+        # Only the user.
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn("date", serializer.errors)
+
+
+class RequestSizeTests(TestCase):
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_large_bodies_are_refused(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="Matt"))
+        response = client.post(
+            "/notes", {"date": "2022-07-01", "message": "x" * 200}, format="json"
+        )
+        self.assertEqual(response.status_code, 413)
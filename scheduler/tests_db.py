@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from scheduler.db.pool import clear_pools, get_pool
+from scheduler.db.sqlite3.base import DatabaseWrapper
+
+
+def pooled_settings(name):
+    return {
+        "ENGINE": "scheduler.db.sqlite3",
+        "NAME": name,
+        "USER": "",
+        "PASSWORD": "",
+        "HOST": "",
+        "PORT": "",
+        "OPTIONS": {},
+        "TIME_ZONE": None,
+        "AUTOCOMMIT": True,
+        "ATOMIC_REQUESTS": False,
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": False,
+        "POOL_SIZE": 1,
+        "TEST": {},
+    }
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.name = os.path.join(self.tmp.name, "pool.sqlite3")
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(clear_pools)
+
+    def test_closed_connection_is_reused(self):
+        wrapper = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertEqual(get_pool("pool-test", 1).qsize(), 1)
+
+        other = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        other.ensure_connection()
+        self.assertIs(other.connection, raw)
+        other.close()
+
+    def test_pool_overflow_closes_connection(self):
+        first = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        second = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        first.ensure_connection()
+        second.ensure_connection()
+        first.close()
+        second.close()
+        self.assertEqual(get_pool("pool-test", 1).qsize(), 1)
+
+    def test_broken_connection_is_discarded(self):
+        wrapper = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        raw.close()
+
+        other = DatabaseWrapper(pooled_settings(self.name), alias="pool-test")
+        other.ensure_connection()
+        self.assertIsNot(other.connection, raw)
+        other.close()
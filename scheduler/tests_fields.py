@@ -0,0 +1,152 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date, Note, RecurringBooking
+from scheduler.properties import property_id
+from scheduler.sparse import parse, prune
+from scheduler.views import (
+    getBatch,
+    getDateById,
+    getMonthById,
+    getNonAdminUsers,
+    getNote,
+)
+
+
+class ParseTests(TestCase):
+    def test_nothing_asked(self):
+        self.assertIsNone(parse("", ""))
+
+    def test_nested_fields_expand(self):
+        sparse = parse("date,users.username", "notes.user")
+        self.assertEqual(sparse.fields, {"date", "users"})
+        self.assertEqual(sparse.expand["users"].fields, {"username"})
+        self.assertIsNone(sparse.expand["notes"].fields)
+        self.assertIn("user", sparse.expand["notes"].expand)
+
+    def test_key_is_canonical(self):
+        self.assertEqual(
+            parse("users,date", "notes").key(), parse("date,users", "notes").key()
+        )
+        self.assertNotEqual(parse("date").key(), parse("date,users").key())
+
+    def test_prune(self):
+        data = {
+            "date": "2020-01-01",
+            "users": [{"id": 1, "username": "Matt", "email": ""}],
+            "notes": [{"id": 4, "user": {"id": 1, "username": "Matt"}}],
+        }
+        self.assertEqual(
+            prune(data, parse("date,users", "")), {"date": "2020-01-01", "users": [1]}
+        )
+        self.assertEqual(
+            prune(data, parse("notes.user.username", "")),
+            {"notes": [{"user": {"username": "Matt"}}]},
+        )
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt", email="m@x.org")
+        cls.anna = User.objects.create(id=2, username="Anna")
+        booked = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        booked.users.add(cls.matt)
+        cls.note = Note.objects.create(date=booked, user=cls.matt, message="Hi")
+        RecurringBooking.objects.create(
+            property_id=property_id(),
+            user=cls.anna,
+            freq=RecurringBooking.DAILY,
+            dtstart=date(2022, 7, 1),
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Resolving the property is cached, keep it out of the counts.
+        property_id()
+
+    def get(self, view, path, *args, **params):
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=self.matt)
+        return view(request, *args)
+
+    def test_unchanged_without_parameters(self):
+        response = self.get(getDateById, "/date/2022-07-01", "2022-07-01")
+        self.assertEqual(
+            [user["username"] for user in response.data["users"]], ["Matt", "Anna"]
+        )
+        self.assertEqual(response.data["notes"][0]["user"]["username"], "Matt")
+
+    def test_ids_only(self):
+        # The date with its user_ids, then the recurring rules: no joins.
+        with self.assertNumQueries(2):
+            response = self.get(
+                getDateById, "/date/2022-07-01", "2022-07-01", fields="date,users"
+            )
+        self.assertEqual(response.data, {"date": "2022-07-01", "users": [1, 2]})
+
+    def test_expand(self):
+        response = self.get(
+            getDateById,
+            "/date/2022-07-01",
+            "2022-07-01",
+            fields="users.username,notes.message,notes.user",
+            expand="notes.user",
+        )
+        self.assertEqual(
+            response.data,
+            {
+                "users": [{"username": "Matt"}, {"username": "Anna"}],
+                "notes": [
+                    {
+                        "message": "Hi",
+                        "user": {"id": 1, "username": "Matt", "email": "m@x.org"},
+                    }
+                ],
+            },
+        )
+
+    def test_recurring_only_day(self):
+        response = self.get(
+            getDateById, "/date/2022-07-02", "2022-07-02", fields="users"
+        )
+        self.assertEqual(response.data, {"users": [2]})
+
+    def test_note_and_users(self):
+        response = self.get(
+            getNote, "/note/%d" % self.note.pk, self.note.pk, fields="message,user"
+        )
+        self.assertEqual(response.data, {"message": "Hi", "user": 1})
+        response = self.get(getNonAdminUsers, "/users/all", fields="username")
+        self.assertCountEqual(
+            response.data, [{"username": "Matt"}, {"username": "Anna"}]
+        )
+
+    def test_month(self):
+        self.get(getMonthById, "/month/2022/07", "2022", "07")
+        # Dates and rules, without fetching the booked users.
+        with self.assertNumQueries(2):
+            response = self.get(
+                getMonthById, "/month/2022/07", "2022", "07", fields="date,users"
+            )
+        self.assertEqual(response.data[0], {"date": "2022-07-01", "users": [1, 2]})
+        self.assertEqual(response.data[1], {"date": "2022-07-02", "users": [2]})
+
+    def test_batch_matches_single_endpoints(self):
+        params = {"fields": "date,users.username,notes"}
+        response = self.get(
+            getBatch,
+            "/batch",
+            dates="2022-07-01,2022-07-02",
+            notes=str(self.note.pk),
+            **params
+        )
+        for day in ("2022-07-01", "2022-07-02"):
+            single = self.get(getDateById, "/date/" + day, day, **params)
+            self.assertEqual(response.data["dates"][day]["data"], single.data)
+        single = self.get(getNote, "/note/%d" % self.note.pk, self.note.pk, **params)
+        self.assertEqual(response.data["notes"][str(self.note.pk)]["data"], single.data)
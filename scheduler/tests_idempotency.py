@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date, IdempotencyKey, Note
+from scheduler.properties import property_id
+from scheduler.views import RegisterUser, createNote
+
+
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(username="Matt")
+        cls.anna = User.objects.create(username="Anna")
+        Date.objects.create(property_id=property_id(), date="2022-07-01")
+
+    def post_note(self, key, message="Hi", user=None):
+        user = user or self.matt
+        request = APIRequestFactory().post(
+            "/notes",
+            {"date": "2022-07-01", "user_id": user.pk, "message": message},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+        force_authenticate(request, user=user)
+        return createNote(request)
+
+    def test_retry_is_replayed(self):
+        first = self.post_note("retry-1")
+        second = self.post_note("retry-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_without_key(self):
+        request = APIRequestFactory().post(
+            "/notes",
+            {"date": "2022-07-01", "user_id": self.matt.pk, "message": "Hi"},
+            format="json",
+        )
+        force_authenticate(request, user=self.matt)
+        createNote(request)
+        createNote(request)
+        self.assertEqual(Note.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_keys_are_per_user(self):
+        self.post_note("shared")
+        self.post_note("shared", user=self.anna)
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_key_reused_for_another_request(self):
+        self.post_note("reused")
+        response = self.post_note("reused", message="Something else")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_in_progress(self):
+        IdempotencyKey.objects.create(owner=self.matt.pk, key="running", fingerprint="")
+        response = self.post_note("running")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Note.objects.count(), 0)
+
+    def test_expired_key_runs_again(self):
+        self.post_note("old")
+        IdempotencyKey.objects.update(created=timezone.now() - timedelta(days=2))
+        response = self.post_note("old")
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_invalid_key(self):
+        self.assertEqual(self.post_note("x" * 256).status_code, 400)
+
+    def test_register_retry(self):
+        def register():
+            request = APIRequestFactory().post(
+                "/register",
+                {"username": "Elle", "password": "testPassword1"},
+                HTTP_IDEMPOTENCY_KEY="signup",
+            )
+            return RegisterUser.as_view()(request)
+
+        first, second = register(), register()
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(User.objects.filter(username="Elle").count(), 1)
+        stored = IdempotencyKey.objects.get()
+        self.assertLess(stored.owner, 0)
+        self.assertEqual(len(stored.fingerprint), 64)
+
+    def test_anonymous_keys_are_per_username(self):
+        def register(username):
+            request = APIRequestFactory().post(
+                "/register",
+                {"username": username, "password": "testPassword1"},
+                HTTP_IDEMPOTENCY_KEY="signup",
+            )
+            return RegisterUser.as_view()(request)
+
+        self.assertEqual(register("Elle").status_code, 201)
+        response = register("Sam")
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+
+    def test_sweep(self):
+        self.post_note("fresh")
+        self.post_note("stale")
+        IdempotencyKey.objects.filter(key="stale").update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        out = StringIO()
+        call_command("sweep_idempotency_keys", stdout=out)
+        self.assertIn("Deleted 1 expired idempotency keys", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["fresh"]
+        )
@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from scheduler import metrics, tasks
+from scheduler.models import Task
+
+MONTH = 'route="month/<year:year>/<month:month>"'
+
+
+def value(text, sample):
+    """The value of the sample line starting with `sample`, 0 if absent."""
+    match = re.search(r"^%s (\S+)$" % re.escape(sample), text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create_user(username="Matt", password="secret")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests(self):
+        before = self.scrape()
+        self.client.force_authenticate(self.matt)
+        self.client.get("/month/2022/07")
+        self.client.get("/month/2022/08")
+        self.client.get("/not-an-api-route")
+        after = self.scrape()
+
+        sample = 'scheduler_requests_total{%s,method="GET",status="200"}' % MONTH
+        self.assertEqual(value(after, sample) - value(before, sample), 2)
+        sample = 'scheduler_request_duration_seconds_count{%s,method="GET"}' % MONTH
+        self.assertEqual(value(after, sample) - value(before, sample), 2)
+        sample = (
+            'scheduler_request_duration_seconds_bucket{%s,method="GET",le="+Inf"}'
+            % MONTH
+        )
+        self.assertEqual(value(after, sample) - value(before, sample), 2)
+        sample = "scheduler_db_queries_total{%s}" % MONTH
+        self.assertGreater(value(after, sample), value(before, sample))
+        self.assertNotIn("not-an-api-route", after)
+
+    def test_logins_and_caches(self):
+        before = self.scrape()
+        self.client.post("/login", {"username": "Matt", "password": "wrong"})
+        self.client.post("/login", {"username": "Matt", "password": "secret"})
+        self.client.force_authenticate(self.matt)
+        self.client.get("/month/2022/07")
+        self.client.get("/month/2022/07")
+        after = self.scrape()
+
+        for outcome in ("failed", "password"):
+            sample = 'scheduler_logins_total{outcome="%s"}' % outcome
+            self.assertEqual(value(after, sample) - value(before, sample), 1)
+        sample = 'scheduler_cache_requests_total{cache="property",result="hit"}'
+        self.assertGreaterEqual(value(after, sample) - value(before, sample), 1)
+
+    def test_tasks(self):
+        before = self.scrape()
+        Task.objects.create(name="scheduler.send_booking_digests")
+        Task.objects.update(created=timezone.now() - timedelta(seconds=30))
+        tasks.run(tasks.claim(1)[0])
+        after = self.scrape()
+
+        name = 'name="scheduler.send_booking_digests"'
+        sample = "scheduler_task_duration_seconds_count{%s}" % name
+        self.assertEqual(value(after, sample) - value(before, sample), 1)
+        for bound, count in (("15", 0), ("60", 1)):
+            sample = 'scheduler_task_latency_seconds_bucket{%s,le="%s"}' % (
+                name,
+                bound,
+            )
+            self.assertEqual(value(after, sample) - value(before, sample), count)
+
+    def test_merges_process_snapshots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = {
+                "time": 0,
+                "metrics": {
+                    "scheduler_logins_total": [[["failed"], 1000]],
+                    "scheduler_task_queue_depth": [[[], 7]],
+                },
+            }
+            with open(os.path.join(directory, "1-1.json"), "w") as file:
+                json.dump(other, file)
+            with override_settings(METRICS_DIR=directory):
+                merged = self.scrape()
+                self.assertEqual(len(os.listdir(directory)), 2)
+        alone = self.scrape()
+
+        sample = 'scheduler_logins_total{outcome="failed"}'
+        self.assertEqual(value(merged, sample), value(alone, sample) + 1000)
+
+    @override_settings(METRICS_TOKEN="scrape")
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,131 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from scheduler.models import BookingEvent, Date, Task
+from scheduler.notifications import send_booking_digests
+from scheduler.properties import property_id
+
+
+class BookingEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.anna = User.objects.create_user("anna", "anna@example.com")
+        cls.ben = User.objects.create_user("ben", "ben@example.com")
+
+    def events(self):
+        return list(
+            BookingEvent.objects.order_by("pk").values_list("date", "user", "action")
+        )
+
+    def test_add_and_remove_are_recorded(self):
+        date = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        date.users.add(self.anna, self.ben)
+        date.users.remove(self.ben)
+        self.assertCountEqual(
+            self.events(),
+            [
+                ("2022-07-01", self.anna.pk, BookingEvent.ADDED),
+                ("2022-07-01", self.ben.pk, BookingEvent.ADDED),
+                ("2022-07-01", self.ben.pk, BookingEvent.REMOVED),
+            ],
+        )
+
+    def test_reverse_and_clear_are_recorded(self):
+        first = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        second = Date.objects.create(property_id=property_id(), date="2022-07-02")
+        self.anna.date_set.add(first, second)
+        self.anna.date_set.clear()
+        removed = BookingEvent.objects.filter(action=BookingEvent.REMOVED)
+        self.assertCountEqual(
+            removed.values_list("date", flat=True), ["2022-07-01", "2022-07-02"]
+        )
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.anna = User.objects.create_user("anna", "anna@example.com")
+        cls.ben = User.objects.create_user("ben", "ben@example.com")
+        cls.cara = User.objects.create_user("cara", "")
+        cls.dan = User.objects.create_user("dan", "dan@example.com")
+
+    def test_one_digest_per_overlapping_user(self):
+        first = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        second = Date.objects.create(property_id=property_id(), date="2022-07-02")
+        first.users.add(self.anna)
+        second.users.add(self.anna)
+        first.users.add(self.ben, self.cara)
+        second.users.add(self.ben)
+
+        self.assertEqual(send_booking_digests(), 2)
+
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        # Ben and Anna hear about each other; Cara has no address; Dan
+        # is not booked on either date.
+        self.assertEqual(set(by_recipient), {"anna@example.com", "ben@example.com"})
+        ben = by_recipient["ben@example.com"].body
+        self.assertIn("anna booked 2022-07-01", ben)
+        self.assertIn("anna booked 2022-07-02", ben)
+        self.assertNotIn("ben booked", ben)
+        anna = by_recipient["anna@example.com"].body
+        self.assertIn("ben booked 2022-07-01", anna)
+        self.assertIn("cara booked 2022-07-01", anna)
+        self.assertFalse(BookingEvent.objects.exists())
+
+    def test_events_are_only_sent_once(self):
+        date = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        date.users.add(self.anna, self.ben)
+        send_booking_digests()
+        mail.outbox.clear()
+        self.assertEqual(send_booking_digests(), 0)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(DIGEST_BATCH_SIZE=1)
+    def test_sends_in_batches(self):
+        date = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        date.users.add(self.anna, self.ben, self.dan)
+        backend = "django.core.mail.backends.locmem.EmailBackend"
+        # Read, who is booked, recipients, then a delete after each batch
+        # that finishes events: the second and the third.
+        with mock.patch(backend + ".open") as open_, mock.patch(backend + ".close"):
+            with self.assertNumQueries(5):
+                self.assertEqual(send_booking_digests(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        # One connection for every batch.
+        open_.assert_called_once()
+
+    @override_settings(DIGEST_BATCH_SIZE=1)
+    def test_failure_keeps_only_unsent_events(self):
+        date = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        date.users.add(self.anna, self.ben)
+        backend = "django.core.mail.backends.locmem.EmailBackend"
+        send_messages = mail.get_connection().send_messages.__func__
+        calls = []
+
+        def fail_second(connection, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise OSError("connection reset")
+            return send_messages(connection, messages)
+
+        with mock.patch(backend + ".send_messages", fail_second):
+            with self.assertRaises(OSError):
+                send_booking_digests()
+        [first] = mail.outbox
+        # Only the event in the unsent digest is left, and sent on retry.
+        self.assertEqual(BookingEvent.objects.count(), 1)
+        self.assertEqual(send_booking_digests(), 1)
+        self.assertNotEqual(mail.outbox[1].to, first.to)
+        self.assertFalse(BookingEvent.objects.exists())
+
+    def test_command_queues_a_task(self):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("send_booking_digests", "--queue", stdout=out)
+        self.assertEqual(Task.objects.get().name, "scheduler.send_booking_digests")
+        self.assertIn("Queued", out.getvalue())
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler import views
+from scheduler.models import Date, Note, Property
+from scheduler.properties import namespace, property_id
+
+
+class PropertyTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=1, username="Matt")
+        cls.lake = Property.objects.create(slug="lake", name="Lake House")
+        cls.shared = Date.objects.create(property_id=property_id(), date="2022-07-01")
+        cls.shared.users.add(cls.user)
+        cls.lake_day = Date.objects.create(property=cls.lake, date="2022-07-01")
+        cls.note = Note.objects.create(date=cls.lake_day, user=cls.user, message="a")
+
+    def setUp(self):
+        cache.clear()
+
+    def call(self, view, method, *args, data=None, **kwargs):
+        request = getattr(APIRequestFactory(), method)("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        return view(request, *args, **kwargs)
+
+    def test_same_day_in_two_properties(self):
+        with self.assertRaises(IntegrityError):
+            Date.objects.create(property=self.lake, date="2022-07-01")
+
+    def test_scoped_routes_resolve(self):
+        match = resolve("/properties/lake/month/2022/07")
+        self.assertEqual(match.func, views.getMonthById)
+        self.assertEqual(match.kwargs, {"slug": "lake", "year": "2022", "month": "07"})
+        self.assertEqual(resolve("/date/2022-07-01").kwargs, {"id": "2022-07-01"})
+
+    def test_reads_are_scoped(self):
+        default = self.call(views.getMonthById, "get", "2022", "07")
+        lake = self.call(views.getMonthById, "get", "2022", "07", slug="lake")
+        self.assertEqual(default.data[0]["users"][0]["id"], 1)
+        self.assertEqual(lake.data[0]["users"], [])
+        self.assertEqual(lake.data[0]["note_count"], 1)
+
+        response = self.call(views.getNote, "get", self.note.pk)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.call(views.getNote, "get", self.note.pk, slug="lake")
+        self.assertEqual(response.data["date"], "2022-07-01")
+
+    def test_unknown_property_is_not_found(self):
+        response = self.call(views.getMonthById, "get", "2022", "07", slug="nope")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_create_in_property(self):
+        response = self.call(
+            views.createDate,
+            "post",
+            data={"date": "2022-07-02", "user_ids": [1], "notes": []},
+            slug="lake",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(Date.objects.filter(property=self.lake, date="2022-07-02"))
+
+        response = self.call(
+            views.createDate,
+            "post",
+            data={"date": "2022-07-02", "user_ids": [], "notes": []},
+            slug="lake",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+        response = self.call(
+            views.createNote,
+            "post",
+            data={"date": "2022-07-02", "user_id": 1, "message": "b"},
+            slug="lake",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(Note.objects.get(pk=response.data).date.property, self.lake)
+
+    @override_settings(MONTH_CACHE_SECONDS=60)
+    def test_month_cache_is_per_property(self):
+        self.call(views.getMonthById, "get", "2022", "07")
+        self.call(views.getMonthById, "get", "2022", "07", slug="lake")
+        lake = namespace(self.lake.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shared.users.remove(self.user)
+        self.assertEqual(namespace(self.lake.pk), lake)
+        with self.assertNumQueries(0):
+            self.call(views.getMonthById, "get", "2022", "07", slug="lake")
+        response = self.call(views.getMonthById, "get", "2022", "07")
+        self.assertEqual(response.data[0]["users"], [])
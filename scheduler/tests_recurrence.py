@@ -0,0 +1,186 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date, RecurringBooking
+from scheduler.properties import property_id
+from scheduler.recurrence import occurrences
+from scheduler.views import createRecurring, getDateById, getMonthById
+
+
+def days(rule, start, end):
+    return [day.isoformat() for day in occurrences(rule, start, end)]
+
+
+class OccurrenceTests(TestCase):
+    def rule(self, **kwargs):
+        return RecurringBooking(user_id=1, **kwargs)
+
+    def test_weekly_on_weekdays(self):
+        # Fridays and Saturdays of July 2022, every week.
+        rule = self.rule(
+            freq=RecurringBooking.WEEKLY,
+            byweekday=[4, 5],
+            dtstart=date(2022, 7, 1),
+            until=date(2022, 7, 16),
+        )
+        self.assertEqual(
+            days(rule, date(2022, 6, 1), date(2022, 12, 31)),
+            ["2022-07-01", "2022-07-02", "2022-07-08", "2022-07-09"]
+            + ["2022-07-15", "2022-07-16"],
+        )
+
+    def test_interval_count_and_exdates(self):
+        rule = self.rule(
+            freq=RecurringBooking.DAILY,
+            interval=3,
+            count=4,
+            exdates=["2022-07-04"],
+            dtstart=date(2022, 7, 1),
+        )
+        self.assertEqual(
+            days(rule, date(2022, 7, 1), date(2022, 8, 1)),
+            ["2022-07-01", "2022-07-07", "2022-07-10"],
+        )
+
+    def test_monthly_and_yearly_skip_missing_days(self):
+        monthly = self.rule(freq=RecurringBooking.MONTHLY, dtstart=date(2022, 1, 31))
+        self.assertEqual(
+            days(monthly, date(2022, 1, 1), date(2022, 5, 31)),
+            ["2022-01-31", "2022-03-31", "2022-05-31"],
+        )
+        yearly = self.rule(freq=RecurringBooking.YEARLY, dtstart=date(2024, 2, 29))
+        self.assertEqual(
+            days(yearly, date(2024, 1, 1), date(2032, 12, 31)),
+            ["2024-02-29", "2028-02-29", "2032-02-29"],
+        )
+
+    def test_skipping_ahead_matches_walking_from_dtstart(self):
+        for freq in ("daily", "weekly", "monthly", "yearly"):
+            rule = self.rule(
+                freq=freq, interval=3, byweekday=[0, 6], dtstart=date(2022, 3, 31)
+            )
+            walked = [
+                day
+                for day in days(rule, rule.dtstart, date(2040, 12, 31))
+                if day >= "2035-06-01"
+            ]
+            self.assertEqual(
+                days(rule, date(2035, 6, 1), date(2040, 12, 31)), walked, freq
+            )
+
+    def test_huge_intervals_stop_at_the_last_date(self):
+        for freq in ("daily", "weekly", "monthly", "yearly"):
+            rule = self.rule(freq=freq, interval=10**12, dtstart=date(2022, 7, 1))
+            self.assertEqual(
+                days(rule, date(2022, 1, 1), date.max), ["2022-07-01"], freq
+            )
+        rule = self.rule(freq="yearly", interval=4001, dtstart=date(2024, 2, 29))
+        self.assertEqual(days(rule, date(2025, 1, 1), date.max), [])
+
+
+class RecurringViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt")
+        cls.anna = User.objects.create(id=2, username="Anna")
+        # Every Saturday from July 2022, with no end.
+        cls.rule = RecurringBooking.objects.create(
+            property_id=property_id(),
+            user=cls.anna,
+            freq=RecurringBooking.WEEKLY,
+            dtstart=date(2022, 7, 2),
+        )
+
+    def call(self, view, method, path, *args, data=None):
+        request = getattr(APIRequestFactory(), method)(path, data, format="json")
+        force_authenticate(request, user=self.matt)
+        return view(request, *args)
+
+    def test_month_merges_occurrences(self):
+        Date.objects.create(property_id=property_id(), date="2022-07-09").users.add(
+            self.matt
+        )
+        response = self.call(getMonthById, "get", "month/2022/07", "2022", "07")
+        self.assertEqual(
+            [(day["date"], [u["id"] for u in day["users"]]) for day in response.data],
+            [
+                ("2022-07-02", [2]),
+                ("2022-07-09", [1, 2]),
+                ("2022-07-16", [2]),
+                ("2022-07-23", [2]),
+                ("2022-07-30", [2]),
+            ],
+        )
+        self.assertFalse(Date.objects.filter(date="2022-07-02").exists())
+
+    def test_get_date_from_rule(self):
+        response = self.call(getDateById, "get", "date/2023-01-07", "2023-01-07")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user["id"] for user in response.data["users"]], [2])
+
+    def test_patch_materializes_occurrence(self):
+        response = self.call(
+            getDateById,
+            "patch",
+            "date/2022-07-16",
+            "2022-07-16",
+            data={"user_ids": [1]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Date.objects.get(date="2022-07-16").user_ids, [1])
+        self.rule.refresh_from_db()
+        self.assertEqual(self.rule.exdates, ["2022-07-16"])
+        response = self.call(getDateById, "get", "date/2022-07-16", "2022-07-16")
+        self.assertEqual([user["id"] for user in response.data["users"]], [1])
+
+    def test_delete_removes_occurrence(self):
+        response = self.call(getDateById, "delete", "date/2022-07-23", "2022-07-23")
+        self.assertEqual(response.status_code, 204)
+        response = self.call(getDateById, "get", "date/2022-07-23", "2022-07-23")
+        self.assertEqual(response.status_code, 404)
+
+    def test_create(self):
+        response = self.call(
+            createRecurring,
+            "post",
+            "recurring",
+            data={
+                "user_id": 1,
+                "freq": "weekly",
+                "byweekday": [4, 5, 6],
+                "dtstart": "2022-07-01",
+                "until": "2022-07-31",
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        rule = RecurringBooking.objects.get(pk=response.data)
+        self.assertEqual(rule.byweekday, [4, 5, 6])
+
+    def test_create_rejects_until_and_count(self):
+        response = self.call(
+            createRecurring,
+            "post",
+            "recurring",
+            data={
+                "user_id": 1,
+                "freq": "daily",
+                "dtstart": "2022-07-01",
+                "until": "2022-07-31",
+                "count": 3,
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_rejects_huge_rules(self):
+        for extra in (
+            {"interval": 10**12},
+            {"count": 10**9},
+            {"until": "9999-12-31"},
+            {"dtstart": "9999-01-01"},
+        ):
+            data = {"user_id": 1, "freq": "daily", "dtstart": "2022-07-01", **extra}
+            response = self.call(createRecurring, "post", "recurring", data=data)
+            self.assertEqual(response.status_code, 400, extra)
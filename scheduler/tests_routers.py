@@ -0,0 +1,71 @@
+from http import HTTPStatus
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date
+from scheduler.properties import property_id
+from scheduler.routers import ReplicaRouter, _read_from_replica
+from scheduler.views import createDate, getDateById
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTestCase(SimpleTestCase):
+    def test_reads_use_default_outside_replica_views(self):
+        self.assertIsNone(ReplicaRouter().db_for_read(Date))
+
+    def test_reads_use_replica_inside_replica_views(self):
+        token = _read_from_replica.set(True)
+        try:
+            self.assertEqual(ReplicaRouter().db_for_read(Date), "replica")
+        finally:
+            _read_from_replica.reset(token)
+
+    def test_writes_use_default(self):
+        token = _read_from_replica.set(True)
+        try:
+            self.assertEqual(ReplicaRouter().db_for_write(Date), "default")
+        finally:
+            _read_from_replica.reset(token)
+
+
+@skipUnless("replica" in settings.DATABASES, "needs a 'replica' database alias")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaReadsTestCase(TestCase):
+    databases = {"default", "replica"}
+    date_id = "2022-02-25"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=1, username="Matt")
+        # Only the replica knows about this date.
+        Date.objects.using("replica").create(
+            property_id=property_id(), date=cls.date_id
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_date(self):
+        request = APIRequestFactory().get("date/" + self.date_id)
+        force_authenticate(request, user=self.user)
+        return getDateById(request, self.date_id)
+
+    def test_get_reads_from_replica(self):
+        response = self.get_date()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_write_pins_user_to_primary(self):
+        request = APIRequestFactory().post(
+            "/date", {"date": "2022-02-26", "user_ids": [], "notes": []}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+        response = createDate(request)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+
+        response = self.get_date()
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
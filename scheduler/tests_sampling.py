@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from pythonjsonlogger.jsonlogger import JsonFormatter
+from rest_framework.test import APIClient
+
+from scheduler.models import Date
+from scheduler.properties import property_id
+
+
+class SlowRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(username="Matt")
+        Date.objects.create(property_id=property_id(), date="2022-07-01").users.add(
+            cls.matt
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.matt)
+
+    def record(self):
+        with self.assertLogs("scheduler.sampling", "INFO") as logs:
+            self.client.get("/month/2022/07")
+        self.assertEqual(len(logs.records), 1)
+        return logs.records[0]
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_SAMPLE_RATE=0)
+    def test_disabled(self):
+        with self.assertNoLogs("scheduler.sampling"):
+            self.client.get("/month/2022/07")
+
+    @override_settings(SLOW_REQUEST_MS=60000, SLOW_REQUEST_SAMPLE_RATE=0)
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs("scheduler.sampling"):
+            self.client.get("/month/2022/07")
+
+    @override_settings(SLOW_REQUEST_MS=0.000001, SLOW_REQUEST_SAMPLE_RATE=0)
+    def test_slow_request(self):
+        record = self.record()
+        self.assertFalse(record.sampled)
+        self.assertEqual(record.route, "month/<year:year>/<month:month>")
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.query_count, len(record.queries))
+        self.assertIn("scheduler_date", " ".join(q["sql"] for q in record.queries))
+        self.assertEqual(record.serializers["DateMonthSerializer"]["calls"], 1)
+        self.assertFalse(hasattr(record, "profile"))
+
+    @override_settings(
+        SLOW_REQUEST_MS=60000, SLOW_REQUEST_SAMPLE_RATE=1, SLOW_REQUEST_MAX_QUERIES=1
+    )
+    def test_sampled_request_is_profiled(self):
+        record = self.record()
+        self.assertTrue(record.sampled)
+        self.assertEqual(len(record.queries), 1)
+        self.assertGreater(record.query_count, 1)
+        self.assertTrue(record.profile)
+        self.assertIn("cumulative_ms", record.profile[0])
+
+
+class SlowRequestsCommandTests(TestCase):
+    @override_settings(SLOW_REQUEST_MS=0.000001)
+    def test_aggregates_json_log(self):
+        matt = User.objects.create(username="Matt")
+        client = APIClient()
+        client.force_authenticate(matt)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "slow.log")
+            handler = logging.FileHandler(path)
+            handler.setFormatter(JsonFormatter("%(levelname)s %(message)s"))
+            logger = logging.getLogger("scheduler.sampling")
+            logger.addHandler(handler)
+            level, propagate = logger.level, logger.propagate
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            try:
+                client.get("/month/2022/07")
+                client.get("/month/2022/08")
+                client.get("/date/2022-07-01")
+            finally:
+                logger.removeHandler(handler)
+                logger.setLevel(level)
+                logger.propagate = propagate
+                handler.close()
+            with open(path) as log:
+                self.assertEqual(len([json.loads(line) for line in log]), 3)
+
+            out = StringIO()
+            call_command("slow_requests", path, "--by", "count", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith("GET month/<year:year>/<month:month>"))
+        self.assertEqual(lines[1].split()[2], "2")
+        self.assertIn("scheduler_date", out.getvalue())
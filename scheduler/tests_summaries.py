@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.models import Date, Note
+from scheduler.properties import property_id
+from scheduler.views import getDateById, getMonthById
+
+
+class DateSummaryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matt = User.objects.create(id=1, username="Matt")
+        cls.anna = User.objects.create(id=2, username="Anna")
+        cls.date = Date.objects.create(property_id=property_id(), date="2022-02-25")
+
+    def summary(self, date_id="2022-02-25"):
+        date = Date.objects.get(date=date_id)
+        return date.user_ids, date.note_count
+
+    def test_patch_updates_user_ids(self):
+        request = APIRequestFactory().patch(
+            "date/2022-02-25", {"user_ids": [2, 1]}, format="json"
+        )
+        force_authenticate(request, user=self.matt)
+        getDateById(request, "2022-02-25")
+        self.assertEqual(self.summary(), ([1, 2], 0))
+
+    def test_reverse_add_and_clear(self):
+        other = Date.objects.create(property_id=property_id(), date="2022-02-26")
+        self.anna.date_set.add(self.date, other)
+        self.assertEqual(self.summary("2022-02-26"), ([2], 0))
+        self.anna.date_set.clear()
+        self.assertEqual(self.summary(), ([], 0))
+        self.assertEqual(self.summary("2022-02-26"), ([], 0))
+
+    def test_date_is_locked_before_booking(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.date.users.add(self.matt)
+        sql = [query["sql"] for query in queries.captured_queries]
+        lock = next(
+            i for i, q in enumerate(sql) if q.startswith('SELECT "scheduler_date"')
+        )
+        insert = next(i for i, q in enumerate(sql) if q.startswith("INSERT"))
+        self.assertLess(lock, insert)
+        self.assertEqual(self.summary(), ([1], 0))
+
+    def test_note_count_follows_notes(self):
+        other = Date.objects.create(property_id=property_id(), date="2022-02-26")
+        note = Note.objects.create(date=self.date, user=self.matt, message="a")
+        Note.objects.create(date=self.date, user=self.matt, message="b")
+        self.assertEqual(self.summary()[1], 2)
+
+        note = Note.objects.get(pk=note.pk)
+        note.date = other
+        note.save()
+        self.assertEqual(self.summary()[1], 1)
+        self.assertEqual(self.summary("2022-02-26")[1], 1)
+
+        note.delete()
+        self.assertEqual(self.summary("2022-02-26")[1], 0)
+
+    def test_month_reads_one_table(self):
+        self.date.users.set([self.matt])
+        Note.objects.create(date=self.date, user=self.matt, message="a")
+        request = APIRequestFactory().get("/month/2022/02")
+        force_authenticate(request, user=self.matt)
+        # Warms the cached property lookup and archive horizon.
+        getMonthById(request, "2022", "02")
+        # The recurring rules, the dates, then the booked users by primary key.
+        with self.assertNumQueries(3):
+            response = getMonthById(request, "2022", "02")
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "date": "2022-02-25",
+                    "users": [{"id": 1, "username": "Matt", "email": ""}],
+                    "note_count": 1,
+                }
+            ],
+        )
+
+    def test_check_command_finds_and_fixes_drift(self):
+        self.date.users.set([self.matt])
+        Date.objects.filter(pk=self.date.pk).update(user_ids=[], note_count=3)
+
+        out = StringIO()
+        call_command("check_date_summaries", stdout=out)
+        self.assertIn("1 dates out of date", out.getvalue())
+
+        call_command("check_date_summaries", "--fix", stdout=StringIO())
+        self.assertEqual(self.summary(), ([1], 0))
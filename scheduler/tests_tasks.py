@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from scheduler import tasks
+from scheduler.models import Task
+from scheduler.signals import task_finished
+
+calls = []
+
+
+@tasks.task(name="tests.record")
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(name="tests.flaky", max_attempts=2, retry_delay=0)
+def flaky():
+    raise RuntimeError("boom")
+
+
+class TaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            record.delay("a")
+            self.assertEqual(Task.objects.count(), 0)
+        for callback in callbacks:
+            callback()
+        task = Task.objects.get()
+        self.assertEqual((task.name, task.args), ("tests.record", ["a"]))
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay("b")
+        self.assertEqual(calls, ["b"])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_unknown_task_rejected(self):
+        with self.assertRaises(KeyError):
+            tasks.enqueue("tests.missing")
+
+    def test_claim_is_exclusive(self):
+        Task.objects.create(name="tests.record", args=["c"])
+        self.assertEqual(len(tasks.claim(5)), 1)
+        self.assertEqual(tasks.claim(5), [])
+
+    def test_worker_runs_due_tasks(self):
+        Task.objects.create(name="tests.record", args=["d"])
+        Task.objects.create(
+            name="tests.record",
+            args=["later"],
+            run_at=timezone.now() + timedelta(hours=1),
+        )
+        finished = []
+
+        def receiver(sender, name, status, **kwargs):
+            finished.append((name, status))
+
+        task_finished.connect(receiver)
+        self.addCleanup(task_finished.disconnect, receiver)
+
+        for task in tasks.claim(5):
+            tasks.run(task)
+
+        self.assertEqual(calls, ["d"])
+        self.assertEqual(finished, [("tests.record", Task.DONE)])
+        self.assertEqual(tasks.queue_depth(), 0)
+
+    def test_failing_task_retries_then_fails(self):
+        task = Task.objects.create(name="tests.flaky")
+        self.assertEqual(tasks.run(tasks.claim(1)[0]), Task.PENDING)
+        self.assertEqual(tasks.run(tasks.claim(1)[0]), Task.FAILED)
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 2)
+        self.assertIn("RuntimeError: boom", task.last_error)
+
+    def test_stale_running_task_is_requeued(self):
+        Task.objects.create(
+            name="tests.record",
+            status=Task.RUNNING,
+            started=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(tasks.requeue_stale(timedelta(minutes=10)), 1)
+        self.assertEqual(tasks.queue_depth(), 1)
+
+
+class RunTasksCommandTestCase(TransactionTestCase):
+    # Pool threads use their own connections, so the rows must be committed.
+
+    def test_once_drains_queue(self):
+        calls.clear()
+        for value in range(3):
+            Task.objects.create(name="tests.record", args=[value])
+        out = StringIO()
+        call_command("run_tasks", "--once", "--threads", "1", stdout=out)
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 3)
@@ -0,0 +1,112 @@
+import threading
+import time
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scheduler.signals import request_coalesced, request_throttled
+from scheduler.singleflight import SingleFlight
+from scheduler.throttling import TokenRateThrottle
+from scheduler.models import Date
+from scheduler.properties import property_id
+from scheduler.views import getDateById, getMonthById
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+        coalesced = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "month"
+
+        def receiver(sender, key, **kwargs):
+            coalesced.append(key)
+
+        request_coalesced.connect(receiver)
+        self.addCleanup(request_coalesced.disconnect, receiver)
+
+        leader = threading.Thread(
+            target=lambda: results.append(flight.do("k", compute))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        # Give the followers time to block on the leader's call.
+        time.sleep(0.2)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(results, ["month"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalesced, ["k"] * 3)
+
+    def test_errors_are_not_cached(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            flight.do("k", fail)
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+
+
+class TokenRateThrottleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=1, username="Matt")
+
+    def setUp(self):
+        cache.clear()
+
+    def get_month(self):
+        request = APIRequestFactory().get("/month/2022/02")
+        force_authenticate(request, user=self.user)
+        return getMonthById(request, "2022", "02")
+
+    def test_requests_over_rate_are_throttled(self):
+        throttled = []
+
+        def receiver(sender, request, scope, **kwargs):
+            throttled.append(scope)
+
+        request_throttled.connect(receiver)
+        self.addCleanup(request_throttled.disconnect, receiver)
+
+        with mock.patch.object(TokenRateThrottle, "THROTTLE_RATES", {"token": "2/min"}):
+            self.assertEqual(self.get_month().status_code, HTTPStatus.OK)
+            self.assertEqual(self.get_month().status_code, HTTPStatus.OK)
+            response = self.get_month()
+
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(throttled, ["token"])
+
+    def test_writes_are_not_throttled(self):
+        Date.objects.create(property_id=property_id(), date="2022-02-01")
+        with mock.patch.object(TokenRateThrottle, "THROTTLE_RATES", {"token": "1/min"}):
+            for _ in range(3):
+                request = APIRequestFactory().patch(
+                    "date/2022-02-01", {"user_ids": [1]}, format="json"
+                )
+                force_authenticate(request, user=self.user)
+                response = getDateById(request, "2022-02-01")
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(self.get_month().status_code, HTTPStatus.OK)
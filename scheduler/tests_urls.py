@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import Resolver404, resolve
+
+from scheduler import views
+
+
+class UrlsTestCase(SimpleTestCase):
+    def test_api_routes_resolve(self):
+        self.assertEqual(resolve("/month/2022/02").func, views.getMonthById)
+        self.assertEqual(resolve("/date/2022-02-25").func, views.getDateById)
+
+    def test_date_id_must_be_a_real_day(self):
+        self.assertEqual(resolve("/date/2024-02-29").kwargs, {"id": "2024-02-29"})
+        with self.assertRaises(Resolver404):
+            resolve("/date/2023-02-31")
+        with self.assertRaises(Resolver404):
+            resolve("/date/not-a-date")
+
+    def test_month_must_be_in_range(self):
+        self.assertEqual(
+            resolve("/month/2022/12").kwargs, {"year": "2022", "month": "12"}
+        )
+        with self.assertRaises(Resolver404):
+            resolve("/month/2022/13")
+        with self.assertRaises(Resolver404):
+            resolve("/month/1999/01")
+
+    def test_malformed_api_path_is_not_served_app(self):
+        response = self.client.get("/date/2023-02-31")
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_path_serves_app(self):
+        match = resolve("/calendar/2022/02")
+        self.assertEqual(match.func.view_class.__name__, "TemplateView")
+
+
+@override_settings(ROOT_URLCONF="cottageCalendar.urls_api")
+class ApiUrlsTestCase(SimpleTestCase):
+    def test_api_routes_resolve(self):
+        self.assertEqual(resolve("/notes").func, views.createNote)
+
+    def test_admin_and_app_not_served(self):
+        with self.assertRaises(Resolver404):
+            resolve("/admin/")
+        with self.assertRaises(Resolver404):
+            resolve("/calendar/2022/02")
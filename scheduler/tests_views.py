@@ -5,8 +5,9 @@ from django.contrib.auth.models import User
 from django.db import Error
 from rest_framework.test import APIRequestFactory
 from rest_framework.test import force_authenticate
-from django.test import Client, TestCase, TransactionTestCase
+from django.test import Client, TestCase
 from scheduler.models import Date, Note
+from scheduler.properties import property_id
 
 from scheduler.views import (
     CustomAuthToken,
@@ -27,7 +28,7 @@ logger = logging.getLogger(__name__)
 
 
 def create_date():
-    return Date.objects.get_or_create(date="2022-02-25")
+    return Date.objects.get_or_create(property_id=property_id(), date="2022-02-25")
 
 
 def create_note(date):
@@ -57,10 +58,9 @@ def register_user():
 ### Test Cases ###
 
 
-class DatePatchTestCase(TransactionTestCase):
-    reset_sequences = True
-
-    def setUp(self):
+class DatePatchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
 
     def test_patch_date_does_not_exist(self):
@@ -105,10 +105,9 @@ class DatePatchTestCase(TransactionTestCase):
         self.assertEqual(date.users.get(username="Matt"), user)
 
 
-class DateDeleteTestCase(TransactionTestCase):
-    reset_sequences = True
-
-    def setUp(self):
+class DateDeleteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
 
     def test_delete_date_does_not_exist(self):
@@ -148,10 +147,9 @@ class DateDeleteTestCase(TransactionTestCase):
         self.assertEqual(Date.objects.all().count(), 0)
 
 
-class DateGetTestCase(TransactionTestCase):
-    reset_sequences = True
-
-    def setUp(self):
+class DateGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
 
     def test_get_date_does_not_exist(self):
@@ -190,13 +188,13 @@ class DateGetTestCase(TransactionTestCase):
         self.assertEqual(response.data, {"date": date_id, "users": [], "notes": []})
 
 
-class MonthTestCase(TransactionTestCase):
-    reset_sequences = True
+class MonthTestCase(TestCase):
     year = "2022"
     month = "02"
     month_url = "/month/" + year + "/" + month
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
 
     def test_get_month_status(self):
@@ -228,15 +226,17 @@ class MonthTestCase(TransactionTestCase):
 
         force_authenticate(request, user=user)
         response = view(request, self.year, self.month)
-        self.assertEqual(response.data, [{"date": "2022-02-25", "users": []}])
+        self.assertEqual(
+            response.data, [{"date": "2022-02-25", "users": [], "note_count": 0}]
+        )
 
 
-class NotePatchTestCase(TransactionTestCase):
-    reset_sequences = True
+class NotePatchTestCase(TestCase):
     note_msg = "Patched Message"
     date_id = "2022-02-25"
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
         create_date()
 
@@ -285,11 +285,11 @@ class NotePatchTestCase(TransactionTestCase):
         self.assertEqual(note.message, self.note_msg)
 
 
-class NoteDeleteTestCase(TransactionTestCase):
-    reset_sequences = True
+class NoteDeleteTestCase(TestCase):
     date_id = "2022-02-25"
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
         create_date()
 
@@ -334,11 +334,11 @@ class NoteDeleteTestCase(TransactionTestCase):
         self.assertEqual(Note.objects.all().count(), 0)
 
 
-class NoteGetTestCase(TransactionTestCase):
-    reset_sequences = True
+class NoteGetTestCase(TestCase):
     date_id = "2022-02-25"
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         create_user()
         create_date()
 
@@ -386,10 +386,9 @@ class NoteGetTestCase(TransactionTestCase):
         self.assertEqual(response.data["user"]["id"], 1)
 
 
-class CreateDateTestCase(TransactionTestCase):
-    reset_sequences = True
-
-    def setUp(self):
+class CreateDateTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         register_user()
 
     def test_create_date_status(self):
@@ -416,12 +415,12 @@ class CreateDateTestCase(TransactionTestCase):
         self.assertEqual(Date.objects.count(), 1)
 
 
-class CreateNoteTestCase(TransactionTestCase):
-    reset_sequences = True
-
-    def setUp(self):
+class CreateNoteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
         register_user()
         create_date()
+        cls.user_id = User.objects.get(username="Matt").pk
 
     def test_create_note_status(self):
         factory = APIRequestFactory()
@@ -429,7 +428,7 @@ class CreateNoteTestCase(TransactionTestCase):
             "/notes",
             {
                 "date": "2022-02-25",
-                "user_id": 1,
+                "user_id": self.user_id,
                 "message": "This is a test note",
             },
         )
@@ -446,7 +445,7 @@ class CreateNoteTestCase(TransactionTestCase):
             "/notes",
             {
                 "date": "2022-02-25",
-                "user_id": 1,
+                "user_id": self.user_id,
                 "message": "This is a test note",
             },
         )
@@ -457,9 +456,7 @@ class CreateNoteTestCase(TransactionTestCase):
         self.assertEqual(Note.objects.count(), 1)
 
 
-class CustomAuthTokenTestCase(TransactionTestCase):
-    reset_sequences = True
-
+class CustomAuthTokenTestCase(TestCase):
     def test_login_user_status(self):
         factory = APIRequestFactory()
         register_user()
@@ -490,9 +487,7 @@ class CustomAuthTokenTestCase(TransactionTestCase):
         self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
 
 
-class RegisterUserTestCase(TransactionTestCase):
-    reset_sequences = True
-
+class RegisterUserTestCase(TestCase):
     def test_register_user_status(self):
         factory = APIRequestFactory()
         request = factory.post(
@@ -536,9 +531,7 @@ class RegisterUserTestCase(TransactionTestCase):
         self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
 
 
-class UsersTestCase(TransactionTestCase):
-    reset_sequences = True
-
+class UsersTestCase(TestCase):
     def test_users_all_status(self):
         factory = APIRequestFactory()
         request = factory.get("/users/all")
@@ -0,0 +1,34 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from scheduler.signals import request_throttled
+
+
+class TokenRateThrottle(SimpleRateThrottle):
+    """
+    Limits reads per authentication token (one token per user), falling
+    back to the client address for anonymous requests. Writes to the same
+    views are not limited or counted. Counts live in the default cache,
+    which must be shared across workers to limit globally.
+    """
+
+    scope = "token"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return True
+        self.request = request
+        return super().allow_request(request, view)
+
+    def throttle_failure(self):
+        request_throttled.send(
+            sender=self.__class__, request=self.request, scope=self.scope
+        )
+        return super().throttle_failure()
@@ -0,0 +1,35 @@
+import time
+
+# The largest value of a BigAutoField, and of an SQLite integer.
+MAX_ID = 2**63 - 1
+
+
+def parse_id(value):
+    """
+    The id written in `value` as ASCII digits, or None. Rejects other
+    digits, such as "²", which str.isdigit allows but int() does not, and
+    ids too large for the database.
+    """
+    if not (isinstance(value, str) and value.isascii() and value.isdigit()):
+        return None
+    if len(value) > len(str(MAX_ID)) or int(value) > MAX_ID:
+        return None
+    return int(value)
+
+
+def delete_in_batches(queryset, batch_size=1000, pause=0):
+    """
+    Delete the rows matched by a queryset one batch of primary keys at a
+    time, so no single statement holds locks over a large range. Returns the
+    number of rows deleted.
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return total
+        model._base_manager.filter(pk__in=pks).delete()
+        total += len(pks)
+        if pause:
+            time.sleep(pause)
@@ -1,25 +1,48 @@
+from calendar import monthrange
+from collections.abc import Mapping
+from datetime import date as calendar_date
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.shortcuts import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
 from django.contrib.auth.models import User
 from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import CreateAPIView
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
+    throttle_classes,
 )
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from scheduler import serializers
+from scheduler import batch, calendar_index, metrics, serializers, sparse
+from scheduler.archive import archived_date, archived_month
+from scheduler.authentication import OptionalTokenAuthentication, issue_token
+from scheduler.dates import parse_day
+from scheduler.idempotency import idempotent
 from rest_framework.authentication import authenticate
 
-from scheduler.models import Date, Note
+from scheduler.models import Date, Note, Property, RecurringBooking
+from scheduler.properties import namespace, scoped
+from scheduler.recurrence import booked_on, materialize, merge_dates
+from scheduler.routers import reading_from_replica, replica_reads
+from scheduler.signals import cache_accessed, login_attempted
+from scheduler.singleflight import SingleFlight
+from scheduler.throttling import TokenRateThrottle
+from scheduler.utils import parse_id
 from scheduler.serializers import (
     DateSerializer,
     NoteSerializer,
+    RecurringBookingSerializer,
     UserLoginSerializer,
     UserRegisterSerializer,
     UserSerializer,
@@ -28,22 +51,63 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Identical month reads arriving together share one query and serialization.
+month_flight = SingleFlight()
+
 
 @api_view(["GET", "PATCH", "DELETE"])
-def getDateById(request, id):
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getDateById(request, id, property_id):
     logger.debug("GET/PUT getDateById", extra={"request": request.data, "id": id})
+    if request.method != "GET":
+        # Recurring bookings on this day become a concrete Date to edit.
+        materialize(property_id, id)
+    recurring = booked_on(property_id, id) if request.method == "GET" else set()
+    fields = sparse.from_request(request) if request.method == "GET" else None
+    dates = Date.objects.filter(property_id=property_id)
+    if request.method == "GET":
+        dates = DateSerializer.prepare(dates, fields)
     try:
-        date = Date.objects.get(date=id)
+        date = dates.get(date=id)
         logger.debug("GOT", extra={"date": date})
     except Date.DoesNotExist:
+        if recurring:
+            users = serializers.booked_users(recurring, fields)
+            users = [users[pk] for pk in sorted(users)]
+            data = {
+                "date": id,
+                "users": UserSerializer(users, many=True).data,
+                "notes": [],
+            }
+            return Response(sparse.prune(data, fields))
+        # Past seasons are read-only from the archive.
+        if request.method == "GET":
+            archived = archived_date(property_id, id)
+        else:
+            archived = None
+        if archived is not None:
+            return Response(sparse.prune(archived, fields))
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == "GET":
-        serializer = DateSerializer(date, context={"request": request})
-        return Response(serializer.data)
+        serializer = DateSerializer(date, context={"request": request}, sparse=fields)
+        data = serializer.data
+        recurring.difference_update(date.user_ids)
+        if recurring and "users" in data:
+            users = serializers.booked_users(recurring, fields)
+            users = [users[pk] for pk in sorted(users)]
+            data["users"] += serializers.date_users(users, fields)
+        return Response(data)
 
     elif request.method == "PATCH":
-        serializer = DateSerializer(date, data=request.data, partial=True)
+        serializer = DateSerializer(
+            date,
+            data=request.data,
+            partial=True,
+            context={"property_id": property_id},
+        )
         if serializer.is_valid():
             serializer.save()
             return Response(status=status.HTTP_200_OK)
@@ -55,50 +119,265 @@ def getDateById(request, id):
 
 
 @api_view(["GET"])
-def getMonthById(request, year, month):
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getMonthById(request, year, month, property_id):
     searchId = year + "-" + month
-    dates = Date.objects.filter(date__startswith=searchId)
-    serializer = serializers.DateMonthSerializer(dates, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    fields = sparse.from_request(request)
+    shape = fields.key() if fields else ""
+
+    def serialize_month():
+        dates = Date.objects.filter(
+            property_id=property_id, date__startswith=searchId
+        ).only("date", "user_ids", "note_count")
+        first = calendar_date(int(year), int(month), 1)
+        last = first.replace(day=monthrange(first.year, first.month)[1])
+        dates = merge_dates(property_id, dates, first, last)
+        nested = fields is None or (fields.wants("users") and "users" in fields.expand)
+        users = serializers.month_users(dates) if nested else {}
+        data = serializers.DateMonthSerializer(
+            dates, many=True, context={"users": users}, sparse=fields
+        ).data
+        archived = archived_month(property_id, searchId)
+        if archived:
+            live = {day["date"] for day in data}
+            archived = [sparse.prune(day, fields) for day in archived]
+            data = sorted(
+                [*data, *(day for day in archived if day["date"] not in live)],
+                key=lambda day: day["date"],
+            )
+        return data
+
+    cache_seconds = settings.MONTH_CACHE_SECONDS
+    if cache_seconds:
+        # Taken before reading, so a change made meanwhile is never cached
+        # under the namespace that follows it.
+        key = "%s:month:%s:%s" % (namespace(property_id), searchId, shape)
+        data = cache.get(key)
+        cache_accessed.send(sender=Date, cache="month", hit=data is not None)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+    # Users pinned to the primary must not share a replica read.
+    replica = reading_from_replica()
+    data = month_flight.do(
+        ("month", property_id, searchId, shape, replica), serialize_month
+    )
+    # A lagging replica could cache a month as it was before the last change.
+    if cache_seconds and not replica:
+        cache.set(key, data, cache_seconds)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getAvailability(request, year, property_id):
+    """
+    Which days of a year are booked, by anyone or by ?user=<id>, as a base64
+    bitmap or, with ?encoding=rle, as [first day, length] runs. Days are
+    numbered from 0 for January 1st.
+    """
+    encoding = request.query_params.get("encoding", "bitmap")
+    user_id = request.query_params.get("user")
+    if encoding not in ("bitmap", "rle"):
+        return Response(
+            "encoding must be bitmap or rle", status=status.HTTP_400_BAD_REQUEST
+        )
+    if user_id is not None:
+        user_id = parse_id(user_id)
+        if user_id is None:
+            return Response("user must be an id", status=status.HTTP_400_BAD_REQUEST)
+
+    year = int(year)
+    days = calendar_index.index.year(property_id, year).days(user_id)
+    numbers = calendar_index.day_numbers(year, days)
+    length = calendar_index.year_length(year)
+    if encoding == "rle":
+        data = calendar_index.runs(numbers)
+    else:
+        data = calendar_index.bitmap(numbers, length)
+    return Response(
+        {
+            "year": year,
+            "days": length,
+            "user": user_id,
+            "encoding": encoding,
+            "data": data,
+        }
+    )
+
+
+@api_view(["GET"])
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getFreeSlots(request, property_id):
+    """
+    Free stretches of at least ?length= days (default 1) between ?from= and
+    ?to= (YYYY-MM-DD, default today and a year later), from the in-process
+    calendar index.
+    """
+    params = request.query_params
+    try:
+        length = int(params.get("length", 1))
+        start = calendar_date.today()
+        if "from" in params:
+            start = parse_day(params["from"])
+        end = start + timedelta(days=365)
+        if "to" in params:
+            end = parse_day(params["to"])
+    except ValueError:
+        return Response(
+            "length must be a number, from and to days as YYYY-MM-DD",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if length < 1 or end < start:
+        return Response(
+            "length must be positive and from not after to",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if (end - start).days >= settings.FREE_SLOTS_MAX_DAYS:
+        return Response(
+            "from and to are more than %d days apart" % settings.FREE_SLOTS_MAX_DAYS,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    slots = calendar_index.free_slots(property_id, start, end, length)
+    return Response(
+        [
+            {
+                "start": first.isoformat(),
+                "end": last.isoformat(),
+                "days": (last - first).days + 1,
+            }
+            for first, last in slots
+        ]
+    )
+
+
+def id_list(request, name):
+    """Ids from ?name=a,b and/or repeated ?name=a&name=b, without repeats."""
+    values = request.query_params.getlist(name)
+    return list(dict.fromkeys(i for value in values for i in value.split(",") if i))
+
+
+@api_view(["GET"])
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getBatch(request, property_id):
+    """
+    Many dates and notes in one round trip, ?dates=YYYY-MM-DD,...&notes=1,...
+    Returns {"dates": {id: item}, "notes": {id: item}}, each item being
+    {"status": 200, "data": ...}, or {"status": 404} or 400 for a bad id.
+    ?fields= and ?expand= apply to both, see scheduler.sparse.
+    """
+    date_ids = id_list(request, "dates")
+    note_ids = id_list(request, "notes")
+    if len(date_ids) + len(note_ids) > settings.BATCH_MAX_ITEMS:
+        return Response(
+            "At most %d dates and notes per batch" % settings.BATCH_MAX_ITEMS,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    fields = sparse.from_request(request)
+    return Response(
+        {
+            "dates": batch.date_details(property_id, date_ids, fields),
+            "notes": batch.note_details(property_id, note_ids, fields),
+        }
+    )
 
 
 @api_view(["POST"])
-def createDate(request):
+@replica_reads
+@idempotent
+@scoped
+def createDate(request, property_id):
     logger.debug("POST createDate", extra={"request": request.data})
 
-    serializer = DateSerializer(data=request.data)
+    serializer = DateSerializer(data=request.data, context={"property_id": property_id})
     if serializer.is_valid():
-        newDate = serializer.save()
+        newDate = serializer.save(property_id=property_id)
         return Response(newDate.date, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["POST"])
-def createNote(request):
+@replica_reads
+@idempotent
+@scoped
+def createNote(request, property_id):
     logger.debug("POST createNote", extra={"request": request.data})
 
-    serializer = NoteSerializer(data=request.data)
+    serializer = NoteSerializer(data=request.data, context={"property_id": property_id})
     if serializer.is_valid():
         newNote = serializer.save()
         return Response(newNote.id, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@replica_reads
+@scoped
+def createRecurring(request, property_id):
+    logger.debug("POST createRecurring", extra={"request": request.data})
+
+    serializer = RecurringBookingSerializer(data=request.data)
+    if serializer.is_valid():
+        rule = serializer.save(property_id=property_id)
+        return Response(rule.id, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["GET", "DELETE"])
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getRecurring(request, id, property_id):
+    logger.debug("GET/DELETE getRecurring", extra={"id": id})
+    try:
+        rule = RecurringBooking.objects.get(pk=id, property_id=property_id)
+    except RecurringBooking.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == "GET":
+        return Response(RecurringBookingSerializer(rule).data)
+
+    # Occurrences already materialized stay booked as concrete dates.
+    rule.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(["GET", "PATCH", "DELETE"])
-def getNote(request, id):
+@throttle_classes([TokenRateThrottle])
+@replica_reads
+@scoped
+def getNote(request, id, property_id):
     logger.debug("GET/PUT getNote", extra={"request": request.data, "id": id})
+    fields = sparse.from_request(request) if request.method == "GET" else None
+    notes = Note.objects.select_related("date")
+    if request.method == "GET":
+        notes = NoteSerializer.prepare(Note.objects.all(), fields)
     try:
-        note = Note.objects.get(pk=id)
+        note = notes.get(pk=id, date__property_id=property_id)
         logger.debug("GOT", extra={"note": note})
     except Note.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == "GET":
-        serializer = NoteSerializer(note, context={"request": request})
+        serializer = NoteSerializer(note, context={"request": request}, sparse=fields)
         return Response(serializer.data)
 
     elif request.method == "PATCH":
-        serializer = NoteSerializer(note, data=request.data, partial=True)
+        serializer = NoteSerializer(
+            note,
+            data=request.data,
+            partial=True,
+            context={"property_id": property_id},
+        )
         if serializer.is_valid():
             serializer.save()
             return Response(status=status.HTTP_200_OK)
@@ -109,11 +388,33 @@ def getNote(request, id):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def getMetrics(request):
+    """
+    Prometheus metrics, see scheduler.metrics. With METRICS_TOKEN set,
+    scrapers must send it as "Authorization: Bearer <token>".
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), "Bearer " + token
+    ):
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @api_view(["GET"])
+@replica_reads
+def getProperties(request):
+    properties = Property.objects.order_by("slug")
+    return Response(serializers.PropertySerializer(properties, many=True).data)
+
+
+@api_view(["GET"])
+@replica_reads
 def getNonAdminUsers(request):
     logger.debug("Users", extra={"request": request.headers})
-    users = User.objects.exclude(username="admin")
-    serializer = serializers.UserSerializer(users, many=True)
+    fields = sparse.from_request(request)
+    users = UserSerializer.prepare(User.objects.exclude(username="admin"), fields)
+    serializer = serializers.UserSerializer(users, many=True, sparse=fields)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -131,14 +432,36 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 class CustomAuthToken(ObtainAuthToken):
+    authentication_classes = (OptionalTokenAuthentication,)
+
     def post(self, request, *args, **kwargs):
+        # Anything but an object is left for the serializer to reject.
+        data = request.data if isinstance(request.data, Mapping) else {}
+        username = data.get("username")
+        if request.auth is not None and request.user.get_username() == username:
+            # Already holding a valid token for this user, so skip hashing
+            # the password again and hand the same token back.
+            logger.debug("Login with token", extra={"user_id": request.user.pk})
+            login_attempted.send(sender=self.__class__, outcome="token")
+            return Response(
+                {
+                    "token": request.auth.key,
+                    "user_id": request.user.pk,
+                }
+            )
+
         serializer = self.serializer_class(
             data=request.data, context={"request": request}
         )
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except ValidationError:
+            login_attempted.send(sender=self.__class__, outcome="failed")
+            raise
         logger.debug("Login", extra={"request": serializer.validated_data})
+        login_attempted.send(sender=self.__class__, outcome="password")
         user = serializer.validated_data["user"]
-        token, created = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
         return Response(
             {
                 "token": token.key,
@@ -150,6 +473,7 @@ class CustomAuthToken(ObtainAuthToken):
 class RegisterUser(CreateAPIView):
     permission_classes = (AllowAny,)
 
+    @method_decorator(idempotent)
     def post(self, request):
         serialized = UserRegisterSerializer(data=request.data)
 
@@ -160,7 +484,7 @@ class RegisterUser(CreateAPIView):
                     username=serialized.data["username"],
                     password=serialized.data["password"],
                 )
-                token, created = Token.objects.get_or_create(user=user)
+                token = issue_token(user)
                 return Response(
                     {
                         "token": token.key,